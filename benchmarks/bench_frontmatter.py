@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Frontmatter Parsing Benchmark
+
+对比 yaml.safe_load 与 list_skills.parse_frontmatter（快速路径 + CSafeLoader 回退）
+在典型 SKILL.md frontmatter 上的解析速度，并校验两者结果一致。
+"""
+
+import sys
+import argparse
+import timeit
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'skill-lister' / 'scripts'))
+sys.path.insert(0, str(REPO_ROOT / 'skill-creator' / 'scripts'))
+
+from list_skills import parse_frontmatter  # noqa: E402
+from create_skill import generate_frontmatter  # noqa: E402
+
+
+def build_samples():
+    """构造测试用的 frontmatter 文本（名称, 文本）"""
+    simple = generate_frontmatter(
+        name='pdf-processor',
+        description='处理 PDF 文件的提取、合并和转换。当用户需要处理 PDF 文档时使用。',
+        license='MIT',
+        compatibility='Python 3.8+',
+        metadata={'author': 'tony', 'version': '"1.2.0"', 'category': 'document'},
+        allowed_tools=['Bash(python:*)', 'Read', 'Write']
+    )
+    minimal = generate_frontmatter(name='hello-world', description='A minimal skill')
+    # 带列表和多行字符串，必须走完整 YAML 解析
+    complex_doc = (
+        "---\n"
+        "name: data-analyzer\n"
+        "description: >\n"
+        "  Analyze tabular data and\n"
+        "  produce charts.\n"
+        "metadata:\n"
+        "  version: 3.0\n"
+        "  tags: [data, charts]\n"
+        "---"
+    )
+
+    samples = []
+    for label, doc in [('simple', simple), ('minimal', minimal), ('complex', complex_doc)]:
+        # generate_frontmatter 输出包含 --- 分隔行，去掉后即为 read_frontmatter 的返回值
+        header = doc.split('---', 2)[1]
+        samples.append((label, header))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='frontmatter 解析性能对比')
+    parser.add_argument('-n', '--number', type=int, default=20000, help='每个样本的解析次数')
+    args = parser.parse_args()
+
+    print(f"libyaml 可用: {yaml.__with_libyaml__}")
+    print(f"{'样本':<10} {'safe_load (us)':>16} {'parse_frontmatter (us)':>24} {'加速比':>8}")
+
+    for label, header in build_samples():
+        expected = yaml.safe_load(header)
+        actual = parse_frontmatter(header)
+        if actual != expected:
+            print(f"❌ {label}: 解析结果不一致\n  safe_load: {expected}\n  parse_frontmatter: {actual}")
+            return 1
+
+        baseline = timeit.timeit(lambda: yaml.safe_load(header), number=args.number)
+        fast = timeit.timeit(lambda: parse_frontmatter(header), number=args.number)
+        per_call = 1e6 / args.number
+        print(f"{label:<10} {baseline * per_call:>16.1f} {fast * per_call:>24.1f} {baseline / fast:>7.1f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
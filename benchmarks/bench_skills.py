@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Skills Benchmark Suite
+
+用 create_skill_structure 生成合成技能树（三种规范各一个根目录，SKILL.md 大小不一，
+部分技能带嵌套的 assets/），然后计时扫描、过滤、各种输出格式、格式验证以及本地安装。
+结果写入 JSON，可与基线文件对比以发现性能回退。
+
+    python3 benchmarks/bench_skills.py --sizes 100,10k -o results.json
+    python3 benchmarks/bench_skills.py --sizes 100,10k --baseline results.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / 'skill-lister' / 'scripts'))
+sys.path.insert(0, str(REPO_ROOT / 'skill-creator' / 'scripts'))
+sys.path.insert(0, str(REPO_ROOT / 'skill-installer' / 'scripts'))
+
+import create_skill  # noqa: E402
+import install_skill  # noqa: E402
+from list_skills import SkillCache, SkillLister  # noqa: E402
+
+# 每种规范的根目录（相对于生成目录）
+STANDARD_ROOTS = [
+    (create_skill.SkillStandard.AGENTSKILLS, '.agent-skills', 'user-AgentSkills'),
+    (create_skill.SkillStandard.CLAUDE, '.claude/skills', 'user-Claude'),
+    (create_skill.SkillStandard.CODEX, '.codex/skills', 'user-Codex'),
+]
+
+# 用于生成描述和正文的词表
+WORDS = (
+    'pdf document image data chart report convert extract merge deploy review test '
+    'api database schema migrate translate summarize 处理 文档 数据 图表 部署 审查'
+).split()
+
+# 安装基准中安装的技能数量上限
+INSTALL_SAMPLE = 100
+
+# 生成完成的标记文件
+READY_MARKER = '.bench-ready'
+
+
+def parse_size(text: str) -> int:
+    """解析规模参数，支持 k 后缀（如 10k）"""
+    text = text.strip().lower()
+    if text.endswith('k'):
+        return int(float(text[:-1]) * 1000)
+    return int(text)
+
+
+def generate_tree(base: Path, count: int) -> List[Tuple[Path, str]]:
+    """生成 count 个技能，均匀分布到三种规范的根目录，返回 (根目录, 级别) 列表"""
+    roots = [(base / rel, level) for _, rel, level in STANDARD_ROOTS]
+    if (base / READY_MARKER).exists():
+        return roots
+
+    if base.exists():
+        shutil.rmtree(base)
+    for root, _ in roots:
+        root.mkdir(parents=True)
+
+    for i in range(count):
+        standard, rel, _ = STANDARD_ROOTS[i % len(STANDARD_ROOTS)]
+        name = f"bench-skill-{i:06d}"
+        words = [WORDS[(i * 7 + j) % len(WORDS)] for j in range(3 + i % 5)]
+        description = f"Synthetic skill {i} for {' '.join(words)} tasks"
+        success, message = create_skill.create_skill_structure(
+            str(base / rel),
+            name,
+            description,
+            standard=standard,
+            include_scripts=i % 3 == 0,
+            include_references=i % 4 == 0,
+            include_assets=i % 5 == 0,
+            license='MIT',
+            metadata={'author': 'bench', 'version': f'"1.{i % 10}.0"'},
+        )
+        if not success:
+            raise RuntimeError(message)
+
+        skill_path = base / rel / name
+        # SKILL.md 大小不一：部分技能附加较长的正文
+        extra_paragraphs = (i % 10) ** 2
+        if extra_paragraphs:
+            with open(skill_path / 'SKILL.md', 'a', encoding='utf-8') as f:
+                for j in range(extra_paragraphs):
+                    f.write(f"\n## 附加说明 {j}\n\n{' '.join(words * 8)}\n")
+        # 嵌套的 assets
+        if i % 5 == 0:
+            nested = skill_path / 'assets' / 'templates' / 'nested'
+            nested.mkdir(parents=True)
+            (nested / 'template.txt').write_text(description * 4, encoding='utf-8')
+
+    (base / READY_MARKER).write_text(str(count), encoding='utf-8')
+    return roots
+
+
+def measure(func: Callable, repeat: int) -> float:
+    """运行 repeat 次，返回最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_size(base: Path, count: int, repeat: int, workdir: Path) -> Dict[str, float]:
+    """对一个规模运行全部基准，返回 {基准名: 秒}"""
+    results = {}
+
+    started = time.perf_counter()
+    roots = generate_tree(base, count)
+    results['generate'] = time.perf_counter() - started
+
+    def scan(workers: int = 1, cache=None):
+        lister = SkillLister(cache=cache)
+        return [s.resolve() for s in lister.scan_skills(roots, workers=workers)]
+
+    results['scan'] = measure(scan, repeat)
+    results['scan_parallel'] = measure(lambda: scan(workers=8), repeat)
+
+    cache_path = workdir / f'cache-{count}.json'
+    warm = SkillCache(cache_path)
+    scan(cache=warm)
+    warm.save()
+
+    def scan_cached():
+        cache = SkillCache(cache_path)
+        cache.load()
+        return scan(cache=cache)
+
+    results['scan_cached'] = measure(scan_cached, repeat)
+
+    lister = SkillLister()
+    skills = scan()
+    results['filter_level'] = measure(lambda: lister.filter_skills(skills, level='user'), repeat)
+    results['filter_search'] = measure(lambda: lister.filter_skills(skills, search='pdf', limit=20), repeat)
+
+    lister.use_color = False
+    formats = {
+        'format_list': lambda: lister.format_list(skills),
+        'format_table': lambda: lister.format_table(skills),
+        'format_json': lambda: lister.format_json(skills),
+        'format_ndjson': lambda: lister.write_ndjson(skills, io.StringIO()),
+        'format_page': lambda: list(lister.iter_list_lines(lister.paginate(skills, 'name', 0, 50, True))),
+        'check_format': lambda: lister.check_format(skills),
+    }
+    for name, func in formats.items():
+        results[name] = measure(func, repeat)
+
+    installer = install_skill.SkillInstaller()
+    results['validate'] = measure(lambda: [installer.validate_skill(s.path) for s in skills], repeat)
+
+    sample = skills[:INSTALL_SAMPLE]
+    target_root = workdir / f'install-{count}'
+
+    def install_one():
+        shutil.rmtree(target_root, ignore_errors=True)
+        installer.install_from_local(sample[0].path, target_root / sample[0].path.name)
+
+    def install_batch():
+        shutil.rmtree(target_root, ignore_errors=True)
+        for skill in sample:
+            success, message = installer.install_from_local(skill.path, target_root / skill.path.name)
+            if not success:
+                raise RuntimeError(message)
+
+    # 覆盖已安装的技能（内容未变，增量同步）
+    def reinstall_sync():
+        for skill in sample:
+            success, message = installer.install_from_local(skill.path, target_root / skill.path.name)
+            if not success:
+                raise RuntimeError(message)
+
+    # 经由内容寻址存储安装（重复安装时对象已存在，只需放置链接；不支持 reflink 时用硬链接）
+    store_installer = install_skill.SkillInstaller(store=install_skill.SkillStore(workdir / 'store', hardlink=True))
+
+    def install_store():
+        shutil.rmtree(target_root, ignore_errors=True)
+        for skill in sample:
+            success, message = store_installer.install_from_local(skill.path, target_root / skill.path.name)
+            if not success:
+                raise RuntimeError(message)
+
+    # 锁定文件批量安装（并发），安装到（沙箱 HOME 下的）用户级目录
+    lock_path = workdir / f'skills-{count}.lock.yaml'
+    lock_path.write_text(
+        'skills:\n' + ''.join(f"  - source: {skill.path}\n" for skill in sample),
+        encoding='utf-8'
+    )
+    user_root = install_skill.SkillInstaller().get_user_skills_dir()
+
+    def install_lockfile():
+        shutil.rmtree(user_root, ignore_errors=True)
+        if install_skill.batch_install(lock_path, jobs=8) != 0:
+            raise RuntimeError(f"批量安装失败: {lock_path}")
+
+    # 安装过程会打印提示，基准中丢弃
+    with redirect_stdout(io.StringIO()):
+        results['install_local'] = measure(install_one, repeat)
+        results[f'install_batch_{len(sample)}'] = measure(install_batch, repeat)
+        results[f'reinstall_sync_{len(sample)}'] = measure(reinstall_sync, repeat)
+        results[f'install_store_{len(sample)}'] = measure(install_store, repeat)
+        results[f'install_lockfile_{len(sample)}'] = measure(install_lockfile, repeat)
+    shutil.rmtree(target_root, ignore_errors=True)
+    shutil.rmtree(user_root, ignore_errors=True)
+
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """与基线对比，返回超过阈值的回退描述"""
+    regressions = []
+    for size, metrics in results['results'].items():
+        base_metrics = baseline.get('results', {}).get(size, {})
+        for name, seconds in metrics.items():
+            base = base_metrics.get(name)
+            if not base or name == 'generate':
+                continue
+            ratio = seconds / base
+            marker = ''
+            if ratio > 1 + threshold:
+                marker = '  ❌ 回退'
+                regressions.append(f"{size} {name}: {base * 1000:.1f} ms → {seconds * 1000:.1f} ms ({ratio:.2f}x)")
+            print(f"  {size:>7} {name:<20} {base * 1000:>10.1f} ms → {seconds * 1000:>10.1f} ms  {ratio:>5.2f}x{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='技能管理脚本的大规模基准测试')
+    parser.add_argument('--sizes', default='100', help='技能数量，逗号分隔，支持 k 后缀 (默认: 100)')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='每项重复次数，取最短耗时 (默认: 3)')
+    parser.add_argument('-o', '--output', help='结果 JSON 文件')
+    parser.add_argument('--baseline', help='基线结果 JSON 文件，用于对比')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定为回退的变慢比例 (默认: 0.2)')
+    parser.add_argument('--workdir', help='生成技能树的目录（保留以便重复使用；默认使用临时目录）')
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='skills-bench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # 避免读取或写入真实的技能目录、缓存、存储和注册表守护进程
+    os.environ['HOME'] = str(workdir / 'home')
+    os.environ['AGENT_SKILLS_CACHE_DIR'] = str(workdir / 'cache')
+    os.environ['AGENT_SKILLS_STORE_DIR'] = str(workdir / 'store')
+    os.environ['AGENT_SKILLS_SYSTEM_DIR'] = str(workdir / 'system')
+    os.environ['AGENT_SKILLS_REGISTRY_SOCKET'] = str(workdir / 'registry.sock')
+    # 用户级目录的覆盖变量会让安装写到真实目录，去掉后统一落在 HOME 下
+    for name in ('AGENT_SKILLS_USER_DIR', 'CLAUDE_SKILLS_DIR', 'CODEX_HOME'):
+        os.environ.pop(name, None)
+
+    results = {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': {},
+    }
+
+    try:
+        for count in sizes:
+            print(f"\n=== {count} 个技能 ===")
+            metrics = bench_size(workdir / f'tree-{count}', count, args.repeat, workdir)
+            results['results'][str(count)] = metrics
+            for name, seconds in metrics.items():
+                print(f"  {name:<20} {seconds * 1000:>10.1f} ms")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n结果已写入: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n与基线对比 ({args.baseline}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项性能回退超过 {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ 没有超过阈值的性能回退")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,20 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 
+# 可选：复用 skill-lister 的三元组索引提示相似的技能名称，并增量更新技能清单
+# （两个技能安装在同一目录下时可用）
+_LISTER_SCRIPTS = Path(__file__).resolve().parent.parent.parent / 'skill-lister' / 'scripts'
+if (_LISTER_SCRIPTS / 'skill_index.py').exists() and str(_LISTER_SCRIPTS) not in sys.path:
+    sys.path.append(str(_LISTER_SCRIPTS))
+try:
+    from skill_index import TrigramIndex
+except ImportError:
+    TrigramIndex = None
+try:
+    from list_skills import update_manifest
+except ImportError:
+    update_manifest = None
+
 
 class SkillStandard(Enum):
     """技能规范标准"""
@@ -120,6 +134,28 @@ def suggest_valid_name(invalid_name: str) -> str:
     return name
 
 
+def find_similar_names(name: str, base_path: str, threshold: float = 0.6) -> List[str]:
+    """
+    查找 base_path 下与 name 相似的已有技能名称（用于提示近似重复的名称）
+
+    需要 skill-lister 的 skill_index 模块，不可用时返回空列表。
+    """
+    if TrigramIndex is None:
+        return []
+
+    try:
+        with os.scandir(base_path) as entries:
+            existing = [
+                entry.name for entry in entries
+                if entry.is_dir() and not entry.name.startswith('.') and entry.name != name
+            ]
+    except OSError:
+        return []
+
+    index = TrigramIndex(existing)
+    return [match for match, _ in index.similar(name, threshold=threshold)]
+
+
 def validate_description(description: str, standard: SkillStandard = SkillStandard.AGENTSKILLS) -> Tuple[bool, str]:
     """根据指定规范验证描述"""
     if len(description) < 1:
@@ -268,6 +304,10 @@ def create_skill_structure(
                 encoding='utf-8'
             )
 
+        # 所在目录已有技能清单时同步更新
+        if update_manifest is not None:
+            update_manifest(skill_path)
+
         return True, f"成功创建技能: {skill_path}"
 
     except Exception as e:
@@ -367,6 +407,14 @@ def interactive_create():
     if not base_path:
         base_path = "."
 
+    # 提示近似重复的技能名称
+    similar = find_similar_names(name, base_path)
+    if similar:
+        print(f"⚠️  已存在名称相似的技能: {', '.join(similar)}")
+        if input("仍然继续创建? (y/n): ").strip().lower() != 'y':
+            print("已取消")
+            return 0
+
     # 创建技能
     print("\n创建技能中...")
     print(f"规范标准: {config['display_name']}")
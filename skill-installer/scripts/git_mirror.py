@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Git Mirror Cache
+
+每个用户一份的 Git 裸镜像缓存。镜像按规范化后的仓库 URL 存放，
+再次安装（或安装到其他规范的目录）同一仓库时只需增量 git fetch，
+新的检出通过 alternates 引用镜像中的对象，不再从远程传输。
+
+缓存总大小超过上限时按最近使用时间淘汰镜像；prune() 可手动清理。
+
+    from git_mirror import GitMirrorCache
+    cache = GitMirrorCache()
+    with cache.use('https://github.com/org/skills.git') as (success, mirror, transferred):
+        if success:
+            git_checkout(repo_dir, mirror, revision, reference=Path(mirror))
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit, unquote
+
+try:
+    import fcntl
+except ImportError:  # Windows：只在进程内加锁
+    fcntl = None
+
+
+# 缓存总大小的默认上限
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# 超过这个时间仍未完成的临时镜像视为中断遗留，prune() 时删除
+STALE_TMP_SECONDS = 3600
+
+_SCP_LIKE = re.compile(r'^(?:(?P<user>[^@/]+)@)?(?P<host>[^:/]+):(?P<path>.+)$')
+
+
+def get_mirror_dir() -> Path:
+    """获取镜像缓存目录（与 skill-lister 共用缓存根目录）"""
+    if 'AGENT_SKILLS_CACHE_DIR' in os.environ:
+        return Path(os.environ['AGENT_SKILLS_CACHE_DIR']) / 'git-mirrors'
+    return Path.home() / '.agent-skills' / '.cache' / 'git-mirrors'
+
+
+def normalize_url(url: str) -> str:
+    """规范化仓库 URL：同一仓库的不同写法映射到同一个镜像
+
+    主机名小写，去掉末尾的 / 和 .git，scp 风格的 git@host:path 转为 ssh://，
+    file:// 和本地路径转为绝对路径。
+    """
+    url = url.strip()
+    if '://' not in url:
+        match = _SCP_LIKE.match(url)
+        if match and not os.path.exists(url):
+            user = match.group('user')
+            url = f"ssh://{user + '@' if user else ''}{match.group('host')}/{match.group('path')}"
+        else:
+            url = Path(os.path.abspath(os.path.expanduser(url))).as_uri()
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme == 'file':
+        path = os.path.realpath(unquote(parts.path))
+    else:
+        path = parts.path
+    path = path.rstrip('/')
+    if path.endswith('.git'):
+        path = path[:-4]
+    netloc = parts.netloc.lower()
+    if scheme == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    return f"{scheme}://{netloc}{path}"
+
+
+def mirror_key(url: str) -> str:
+    """镜像目录名：可读的仓库名加 URL 哈希"""
+    normalized = normalize_url(url)
+    name = re.sub(r'[^A-Za-z0-9._-]+', '-', normalized.rsplit('/', 1)[-1]).strip('-') or 'repo'
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+    return f"{name}-{digest}"
+
+
+def _run_git(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(['git', *args], capture_output=True, text=True)
+
+
+def _dir_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class GitMirrorCache:
+    """Git 裸镜像缓存（线程安全；多个进程通过文件锁协调）"""
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or get_mirror_dir()
+        self.max_bytes = max_bytes
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def mirror_path(self, url: str) -> Path:
+        return self.root / (mirror_key(url) + '.git')
+
+    @contextmanager
+    def _lock(self, key: str, blocking: bool = True) -> Iterator[bool]:
+        """镜像锁：进程内用线程锁，进程间用 flock；非阻塞模式下拿不到锁时产出 False
+
+        evict() 持有锁时会删除锁文件。加锁后确认锁住的仍是该路径上的文件，
+        否则（等待期间被删除或替换）重新打开，避免两个进程各自锁住不同的 inode。
+        """
+        with self._locks_guard:
+            thread_lock = self._locks.setdefault(key, threading.Lock())
+        if not thread_lock.acquire(blocking):
+            yield False
+            return
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            lock_path = self.root / (key + '.lock')
+            while True:
+                with open(lock_path, 'a') as f:
+                    if fcntl is not None:
+                        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+                        try:
+                            fcntl.flock(f, flags)
+                        except BlockingIOError:
+                            yield False
+                            return
+                        try:
+                            current = os.stat(lock_path).st_ino == os.fstat(f.fileno()).st_ino
+                        except FileNotFoundError:
+                            current = False
+                        if not current:
+                            continue
+                    yield True
+                    return
+        finally:
+            thread_lock.release()
+
+    @contextmanager
+    def use(self, url: str) -> Iterator[Tuple[bool, str, int]]:
+        """创建或增量更新镜像，并在 with 块内持有镜像锁（检出期间不会被更新或淘汰）
+
+        产出 (是否成功, 镜像路径或错误信息, 本次传输的字节数)。
+        """
+        key = mirror_key(url)
+        with self._lock(key):
+            result = self._update(url, self.root / (key + '.git'))
+            yield result
+        if result[0]:
+            self.evict(keep={key})
+
+    def _update(self, url: str, path: Path) -> Tuple[bool, str, int]:
+        if path.is_dir():
+            before = _dir_size(path)
+            result = _run_git(['-C', str(path), 'fetch', '--quiet', '--prune', 'origin'])
+            if result.returncode != 0:
+                return False, f"更新镜像失败: {result.stderr.strip()}", 0
+            transferred = max(0, _dir_size(path) - before)
+        else:
+            # 先克隆到临时目录，完成后再改名，避免中断留下不完整的镜像
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp_path = Path(tempfile.mkdtemp(prefix=path.name + '.tmp-', dir=self.root))
+            try:
+                result = _run_git(['clone', '--quiet', '--mirror', url, str(tmp_path)])
+                if result.returncode != 0:
+                    return False, f"创建镜像失败: {result.stderr.strip()}", 0
+                # 允许按提交哈希获取镜像中的任意版本
+                _run_git(['-C', str(tmp_path), 'config', 'uploadpack.allowAnySHA1InWant', 'true'])
+                tmp_path.rename(path)
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            transferred = _dir_size(path)
+
+        # 目录 mtime 记录最近使用时间，用于淘汰
+        os.utime(path)
+        return True, str(path), transferred
+
+    def mirrors(self) -> List[Dict]:
+        """列出所有镜像 {key, path, size, last_used}，按最近使用时间升序"""
+        if not self.root.is_dir():
+            return []
+        items = []
+        for path in self.root.glob('*.git'):
+            try:
+                last_used = path.stat().st_mtime
+            except OSError:
+                continue
+            items.append({'key': path.name[:-4], 'path': path, 'size': _dir_size(path), 'last_used': last_used})
+        items.sort(key=lambda item: item['last_used'])
+        return items
+
+    def evict(self, max_bytes: Optional[int] = None, keep: Iterable[str] = ()) -> List[Dict]:
+        """按最近使用时间淘汰镜像，直到总大小不超过 max_bytes（默认为缓存上限），返回被删除的镜像
+
+        keep 中的镜像和正在被其他安装使用的镜像不会被删除。
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        items = self.mirrors()
+        total = sum(item['size'] for item in items)
+        removed = []
+        for item in items:
+            if total <= limit:
+                break
+            if item['key'] in keep:
+                continue
+            with self._lock(item['key'], blocking=False) as acquired:
+                if not acquired:
+                    continue
+                shutil.rmtree(item['path'], ignore_errors=True)
+                # 持有锁时删除锁文件，之后等待该锁的进程会发现 inode 已变化并重新打开
+                try:
+                    (self.root / (item['key'] + '.lock')).unlink()
+                except OSError:
+                    pass
+            total -= item['size']
+            removed.append(item)
+        return removed
+
+    def prune(self, max_bytes: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """清理缓存：删除中断遗留的临时镜像，再按大小上限淘汰，返回 (被删除的镜像, 剩余总大小)"""
+        if self.root.is_dir():
+            cutoff = time.time() - STALE_TMP_SECONDS
+            for tmp_path in self.root.glob('*.git.tmp-*'):
+                try:
+                    if tmp_path.stat().st_mtime < cutoff:
+                        shutil.rmtree(tmp_path, ignore_errors=True)
+                except OSError:
+                    pass
+        removed = self.evict(max_bytes)
+        return removed, sum(item['size'] for item in self.mirrors())
@@ -9,13 +9,150 @@ Skill Installer Script
 import os
 import re
 import sys
+import json
+import stat
+import time
 import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
 import subprocess
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import yaml
 
+from git_mirror import DEFAULT_MAX_BYTES, GitMirrorCache
+from skill_store import SkillStore, file_digest
+
+# 可选：复用 skill-lister 的 frontmatter 读取与解析、根目录解析、技能清单增量更新和分阶段计时
+# （两个技能安装在同一目录下时可用）
+_LISTER_SCRIPTS = Path(__file__).resolve().parent.parent.parent / 'skill-lister' / 'scripts'
+if (_LISTER_SCRIPTS / 'list_skills.py').exists() and str(_LISTER_SCRIPTS) not in sys.path:
+    sys.path.append(str(_LISTER_SCRIPTS))
+try:
+    from list_skills import (
+        FrontmatterError, SkillRootResolver, find_project_root, parse_frontmatter, read_frontmatter, update_manifest
+    )
+except ImportError:
+    update_manifest = None
+
+    # 单独安装时使用本地实现；frontmatter 大小上限，防止格式错误的 SKILL.md 导致读取整个文件
+    MAX_FRONTMATTER_BYTES = 64 * 1024
+
+    class FrontmatterError(ValueError):
+        """SKILL.md frontmatter 格式错误"""
+
+    def read_frontmatter(skill_md: Path, max_bytes: int = MAX_FRONTMATTER_BYTES) -> str:
+        """逐行读取 SKILL.md 的 YAML frontmatter
+
+        读到结束的 --- 即停止，不会读取正文；超过 max_bytes 时抛出 FrontmatterError。
+        """
+        with open(skill_md, 'rb') as f:
+            first = f.readline(max_bytes + 1)
+            if not first.startswith(b'---'):
+                raise FrontmatterError("SKILL.md 必须以 YAML frontmatter 开头")
+
+            chunks = [first[3:]]
+            size = len(first)
+            while True:
+                line = f.readline(max_bytes + 1 - size)
+                if not line:
+                    raise FrontmatterError("YAML frontmatter 格式错误")
+                if line.startswith(b'---'):
+                    break
+                size += len(line)
+                if size > max_bytes:
+                    raise FrontmatterError(f"YAML frontmatter 超过大小上限 ({max_bytes} 字节)")
+                chunks.append(line)
+
+        return b''.join(chunks).decode('utf-8')
+
+    def parse_frontmatter(header: str):
+        """解析 frontmatter 文本（不使用 skill-lister 的快速路径），YAML 语法错误以 FrontmatterError 抛出"""
+        try:
+            return yaml.load(header, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+        except yaml.YAMLError as e:
+            raise FrontmatterError(f"YAML 解析错误: {e}") from e
+
+    # 项目根目录标识文件
+    PROJECT_MARKERS = [
+        '.git', 'package.json', 'pyproject.toml',
+        'Cargo.toml', 'pom.xml', 'go.mod', 'setup.py'
+    ]
+
+    _UNSET = object()
+
+    def find_project_root(start_path: Optional[Path] = None) -> Optional[Path]:
+        """从 start_path（默认当前目录）向上查找项目根目录"""
+        if start_path is None:
+            start_path = Path.cwd()
+
+        current = start_path.resolve()
+        while current != current.parent:
+            if any((current / marker).exists() for marker in PROJECT_MARKERS):
+                return current
+            current = current.parent
+
+        return None
+
+    class SkillRootResolver:
+        """项目根目录和技能根目录解析器
+
+        项目根目录只向上查找一次，候选技能根目录的存在性检查结果（存在与不存在）都会被缓存。
+        SkillLister 和 SkillInstaller 可以共用同一个实例；长期运行的调用方在目录变化后
+        调用 invalidate() 清除缓存。
+        """
+
+        def __init__(self, start_path: Optional[Path] = None):
+            self.start_path = start_path
+            self._project_root = _UNSET
+            self._exists = {}
+
+        def project_root(self) -> Optional[Path]:
+            """项目根目录（结果会被缓存）"""
+            if self._project_root is _UNSET:
+                self._project_root = find_project_root(self.start_path)
+            return self._project_root
+
+        def exists(self, path: Path) -> bool:
+            """检查候选技能根目录是否存在（结果会被缓存）"""
+            key = str(path)
+            result = self._exists.get(key)
+            if result is None:
+                result = self._exists[key] = path.exists()
+            return result
+
+        def invalidate(self, path: Optional[Path] = None):
+            """清除缓存：指定路径则只清除该路径的存在性结果，否则全部清除（包括项目根目录）"""
+            if path is None:
+                self._project_root = _UNSET
+                self._exists.clear()
+            else:
+                self._exists.pop(str(path), None)
+
+try:
+    import skill_profile
+    from skill_profile import profiled
+except ImportError:
+    skill_profile = None
+
+    def profiled(name):
+        """skill-lister 不可用时不做分析"""
+        return lambda func: func
+
+
+def _phase(name: str):
+    """分析阶段（skill-lister 不可用或未启用分析时为空操作）"""
+    return skill_profile.phase(name) if skill_profile is not None else nullcontext()
+
+
+def _count(name: str, n: int = 1):
+    if skill_profile is not None:
+        skill_profile.count(name, n)
+
 
 class SkillStandard(Enum):
     """技能规范标准"""
@@ -53,14 +190,166 @@ STANDARD_CONFIG = {
 }
 
 
+# 计算技能内容哈希时忽略的目录
+TREE_HASH_IGNORE = frozenset({'.git', '__pycache__'})
+
+
+def tree_hash(root: Path) -> str:
+    """技能目录内容的哈希
+
+    由相对路径和文件内容决定（不含权限位，安装时设置的脚本可执行权限不影响哈希），
+    忽略 .git 和 __pycache__。源目录和安装后的目录哈希相同。
+    """
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in TREE_HASH_IGNORE)
+        relative = Path(dirpath).relative_to(root)
+        for filename in sorted(filenames):
+            path = Path(dirpath, filename)
+            digest.update((relative / filename).as_posix().encode('utf-8', 'surrogateescape') + b'\0')
+            if path.is_symlink():
+                digest.update(b'L' + os.fsencode(os.readlink(path)) + b'\0')
+                continue
+            digest.update(b'F' + bytes.fromhex(file_digest(path)))
+    return 'sha256:' + digest.hexdigest()
+
+
+def _tree_entries(root: Path, follow_symlinks: bool) -> Dict[Path, str]:
+    """列出目录下的条目 {相对路径: 'dir' | 'file' | 'link'}（不跟随符号链接时链接单独标记）"""
+    entries = {}
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=follow_symlinks):
+        relative = Path(dirpath).relative_to(root)
+        for kind, names in (('dir', dirnames), ('file', filenames)):
+            for name in names:
+                if not follow_symlinks and os.path.islink(os.path.join(dirpath, name)):
+                    entries[relative / name] = 'link'
+                else:
+                    entries[relative / name] = kind
+    return entries
+
+
+def is_git_source(source: str) -> bool:
+    """技能源是否为 Git 仓库 URL"""
+    return source.startswith(('http://', 'https://', 'ssh://', 'git://', 'git@', 'file://')) or source.endswith('.git')
+
+
+def run_git(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(['git', *args], capture_output=True, text=True)
+
+
+# 可能是缩写的提交哈希（服务器不接受按缩写获取，需要先获取历史再在本地解析）
+_SHORT_SHA = re.compile(r'^[0-9a-fA-F]{4,39}$')
+
+
+def git_checkout(
+    repo_dir: Path,
+    git_url: str,
+    revision: Optional[str] = None,
+    subpath: Optional[str] = None,
+    depth: Optional[int] = 1,
+    blob_filter: Optional[str] = None,
+    reference: Optional[Path] = None
+) -> Tuple[bool, str]:
+    """把仓库的一个版本检出到 repo_dir
+
+    用 init + fetch 代替 clone，这样 revision 可以是分支、标签或提交哈希，且只获取这一个版本。
+    有 subpath 时先设置稀疏检出，配合 blob_filter（如 blob:none）只下载该目录的文件内容。
+    服务器不支持过滤时 git 会忽略 blob_filter 并获取完整对象。
+    reference 是本地镜像仓库，通过 alternates 直接使用其中的对象。
+    revision 为缩写的提交哈希时直接获取会失败，此时获取各分支的完整历史后在本地解析。
+    """
+    repo = str(repo_dir)
+    steps = [
+        ['init', '--quiet', repo],
+        ['-C', repo, 'remote', 'add', 'origin', git_url],
+    ]
+    if reference is not None:
+        result = run_git(steps.pop(0))
+        if result.returncode != 0:
+            return False, f"git init 失败: {result.stderr.strip()}"
+        alternates = repo_dir / '.git' / 'objects' / 'info' / 'alternates'
+        alternates.parent.mkdir(parents=True, exist_ok=True)
+        alternates.write_text(str(Path(reference).resolve() / 'objects') + '\n', encoding='utf-8')
+    if subpath:
+        steps.append(['-C', repo, 'sparse-checkout', 'set', subpath])
+    fetch = ['-C', repo, 'fetch', '--quiet', '--no-tags']
+    if depth:
+        fetch.append(f'--depth={depth}')
+    if blob_filter:
+        fetch.append(f'--filter={blob_filter}')
+
+    for args in steps:
+        result = run_git(args)
+        if result.returncode != 0:
+            return False, f"git {args[2] if args[0] == '-C' else args[0]} 失败: {result.stderr.strip()}"
+
+    commit = 'FETCH_HEAD'
+    result = run_git(fetch + ['origin', revision or 'HEAD'])
+    if result.returncode != 0:
+        if not (revision and _SHORT_SHA.match(revision)):
+            return False, f"git fetch 失败: {result.stderr.strip()}"
+        # 缩写的提交哈希：获取各分支的完整历史（不限深度）后在本地解析
+        result = run_git([arg for arg in fetch if not arg.startswith('--depth')] + ['origin'])
+        if result.returncode != 0:
+            return False, f"git fetch 失败: {result.stderr.strip()}"
+        result = run_git(['-C', repo, 'rev-parse', '--verify', '--quiet', f'{revision}^{{commit}}'])
+        if result.returncode != 0:
+            return False, f"无法解析提交 {revision}：请使用完整的 40 位提交哈希，或确认该提交在远程分支上"
+        commit = result.stdout.strip()
+
+    result = run_git(['-C', repo, 'checkout', '--quiet', commit])
+    if result.returncode != 0:
+        return False, f"git checkout 失败: {result.stderr.strip()}"
+    return True, "检出完成"
+
+
+def dir_size(path: Path) -> int:
+    """目录下所有文件的总字节数"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def format_bytes(size: int) -> str:
+    """以 B/KB/MB/GB 显示字节数"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+# 安装结果中各放置方式的名称
+STORE_METHOD_NAMES = {'reflink': 'reflink', 'hardlink': '硬链接', 'copy': '复制'}
+
+
 class SkillInstaller:
     """技能安装器"""
 
     INSTALL_LEVELS = ['user', 'project', 'workspace', 'system']
 
-    def __init__(self, standard: SkillStandard = SkillStandard.AGENTSKILLS):
+    # 并发安装到同一根目录时，串行更新技能清单
+    _manifest_lock = threading.Lock()
+
+    def __init__(
+        self,
+        standard: SkillStandard = SkillStandard.AGENTSKILLS,
+        resolver: Optional[SkillRootResolver] = None,
+        mirror_cache: Optional[GitMirrorCache] = None,
+        store: Optional[SkillStore] = None
+    ):
         self.standard = standard
         self.standard_config = STANDARD_CONFIG[standard]
+        self.resolver = resolver or SkillRootResolver()
+        # Git 镜像缓存（None 表示每次直接从远程获取）
+        self.mirror_cache = mirror_cache
+        # 内容寻址存储（None 表示本地安装时直接复制）
+        self.store = store
         self.config = self.load_config()
 
     def load_config(self) -> Dict:
@@ -99,22 +388,10 @@ class SkillInstaller:
         return Path.home() / user_dir
 
     def find_project_root(self, start_path: Optional[Path] = None) -> Optional[Path]:
-        """查找项目根目录"""
+        """查找项目根目录（未指定起点时使用解析器缓存的结果）"""
         if start_path is None:
-            start_path = Path.cwd()
-
-        current = start_path.resolve()
-        project_markers = [
-            '.git', 'package.json', 'pyproject.toml',
-            'Cargo.toml', 'pom.xml', 'go.mod', 'setup.py'
-        ]
-
-        while current != current.parent:
-            if any((current / marker).exists() for marker in project_markers):
-                return current
-            current = current.parent
-
-        return None
+            return self.resolver.project_root()
+        return find_project_root(start_path)
 
     def get_project_skills_dir(self) -> Optional[Path]:
         """获取项目级技能目录(根据规范)"""
@@ -160,6 +437,7 @@ class SkillInstaller:
 
         return base / skill_name
 
+    @profiled('validate')
     def validate_skill(self, skill_path: Path) -> Tuple[bool, str]:
         """验证技能格式"""
         skill_md = skill_path / 'SKILL.md'
@@ -167,18 +445,17 @@ class SkillInstaller:
             return False, "找不到 SKILL.md 文件"
 
         try:
-            content = skill_md.read_text(encoding='utf-8')
-
-            # 检查 YAML frontmatter
-            if not content.startswith('---'):
-                return False, "SKILL.md 必须以 YAML frontmatter 开头"
-
-            # 提取 frontmatter
-            parts = content.split('---', 2)
-            if len(parts) < 3:
-                return False, "YAML frontmatter 格式错误"
-
-            frontmatter = yaml.safe_load(parts[1])
+            # 提取 YAML frontmatter（不读取正文）
+            try:
+                with _phase('read_frontmatter'):
+                    _count('reads')
+                    header = read_frontmatter(skill_md)
+                _count('bytes_read', len(header))
+
+                with _phase('parse_yaml'):
+                    frontmatter = parse_frontmatter(header)
+            except FrontmatterError as e:
+                return False, str(e)
 
             # 验证必需字段
             if 'name' not in frontmatter:
@@ -209,13 +486,23 @@ class SkillInstaller:
         except Exception as e:
             return False, f"验证时出错: {str(e)}"
 
+    @staticmethod
+    def is_script(relative: Path) -> bool:
+        """技能内的相对路径是否为需要可执行权限的脚本（Unix-like 系统）"""
+        return os.name != 'nt' and relative.parent == Path('scripts') and relative.suffix in ['.sh', '.py']
+
+    @profiled('install')
     def install_from_local(
         self,
         source_path: Path,
         target_path: Path,
-        backup: bool = False
+        backup: bool = False,
+        sync: bool = True
     ) -> Tuple[bool, str]:
-        """从本地路径安装技能"""
+        """从本地路径安装技能
+
+        目标已安装且不需要备份时（sync 为真），只同步改动过的文件，不再删除后整个复制。
+        """
         try:
             # 检查源路径
             if not source_path.exists():
@@ -226,6 +513,14 @@ class SkillInstaller:
             if not valid:
                 return False, f"技能验证失败: {msg}"
 
+            # 增量同步已安装的技能
+            if sync and not backup and target_path.is_dir() and not target_path.is_symlink():
+                with _phase('sync'):
+                    stats = self.sync_skill(source_path, target_path)
+                self.update_manifest(target_path)
+                return True, (f"成功同步到: {target_path} (复制 {stats['copied']}，"
+                              f"未改动 {stats['unchanged']}，删除 {stats['deleted']})")
+
             # 处理已存在的目标
             if target_path.exists():
                 if backup:
@@ -239,9 +534,21 @@ class SkillInstaller:
 
             # 创建父目录
             target_path.parent.mkdir(parents=True, exist_ok=True)
+            self.resolver.invalidate(target_path.parent)
+
+            # 经由存储放置技能文件，脚本权限在放置时设置
+            if self.store is not None:
+                with _phase('copy'):
+                    stats = self.store.materialize(source_path, target_path, self.is_script)
+                for method, n in stats.items():
+                    _count(f'store_{method}', n)
+                self.update_manifest(target_path)
+                placed = '，'.join(f"{STORE_METHOD_NAMES[method]} {n}" for method, n in stats.items() if n)
+                return True, f"成功安装到: {target_path} ({placed or '无文件'})"
 
             # 复制技能
-            shutil.copytree(source_path, target_path)
+            with _phase('copy'):
+                shutil.copytree(source_path, target_path)
 
             # 设置脚本权限（Unix-like 系统）
             if os.name != 'nt':
@@ -251,57 +558,168 @@ class SkillInstaller:
                         if script.is_file() and script.suffix in ['.sh', '.py']:
                             script.chmod(0o755)
 
+            self.update_manifest(target_path)
             return True, f"成功安装到: {target_path}"
 
         except Exception as e:
             return False, f"安装失败: {str(e)}"
 
+    def sync_skill(self, source_path: Path, target_path: Path) -> Dict[str, int]:
+        """把源目录增量同步到已安装的技能目录，返回 {copied, unchanged, deleted}
+
+        先比较大小和修改时间，修改时间不同时再比较内容哈希；只写入新增或改动过的文件，
+        删除源目录中已不存在的文件和目录。与 shutil.copytree 一样跟随源目录中的符号链接。
+        文件先写入临时文件再替换（或经由存储重新放置），不会改写与存储共享的硬链接。
+        """
+        stats = {'copied': 0, 'unchanged': 0, 'deleted': 0}
+        source_entries = _tree_entries(source_path, follow_symlinks=True)
+        target_entries = _tree_entries(target_path, follow_symlinks=False)
+
+        # 先删除源目录中已不存在或类型不同的条目（子条目排在父目录之前）
+        for relative, kind in sorted(target_entries.items(), reverse=True):
+            if source_entries.get(relative) == kind:
+                continue
+            path = target_path / relative
+            if kind == 'dir':
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+            del target_entries[relative]
+            stats['deleted'] += 1
+
+        for relative, kind in sorted(source_entries.items()):
+            dest = target_path / relative
+            if kind == 'dir':
+                dest.mkdir(exist_ok=True)
+                continue
+            source = source_path / relative
+            st = source.stat()
+            script = self.is_script(relative)
+            mode = 0o755 if script else stat.S_IMODE(st.st_mode)
+            if relative in target_entries and self._same_file(source, st, dest, mode):
+                stats['unchanged'] += 1
+                continue
+            if self.store is not None:
+                dest.unlink(missing_ok=True)
+                self.store.place(source, dest, script)
+            else:
+                fd, tmp = tempfile.mkstemp(prefix=f'.{dest.name}.', dir=dest.parent)
+                os.close(fd)
+                try:
+                    shutil.copy2(source, tmp)
+                    os.chmod(tmp, mode)
+                    os.replace(tmp, dest)
+                except BaseException:
+                    Path(tmp).unlink(missing_ok=True)
+                    raise
+            stats['copied'] += 1
+
+        _count('sync_copied', stats['copied'])
+        return stats
+
+    @staticmethod
+    def _same_file(source: Path, st: os.stat_result, dest: Path, mode: int) -> bool:
+        """已安装的文件与源文件内容是否相同（相同时按需修正权限）"""
+        installed = dest.stat()
+        if installed.st_size != st.st_size:
+            return False
+        if installed.st_mtime_ns != st.st_mtime_ns:
+            _count('sync_hashed')
+            with _phase('hash'):
+                if file_digest(source) != file_digest(dest):
+                    return False
+            if installed.st_nlink == 1:
+                # 记录源文件的修改时间，下次同步时无需再计算哈希
+                os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        if stat.S_IMODE(installed.st_mode) == mode:
+            return True
+        if installed.st_nlink > 1:
+            # 与存储共享的硬链接是只读的，只比较可执行位
+            return bool(installed.st_mode & 0o111) == bool(mode & 0o111)
+        dest.chmod(mode)
+        return True
+
+    @profiled('install')
     def install_from_git(
         self,
         git_url: str,
         target_path: Path,
-        backup: bool = False
+        backup: bool = False,
+        revision: Optional[str] = None,
+        subpath: Optional[str] = None,
+        depth: Optional[int] = 1,
+        blob_filter: Optional[str] = 'blob:none'
     ) -> Tuple[bool, str]:
-        """从 Git 仓库安装技能"""
+        """从 Git 仓库安装技能
+
+        只获取 revision（提交、标签或分支，默认为远程 HEAD）的浅克隆（depth 为 None 时获取完整历史），
+        blob_filter 启用部分克隆，subpath 指定技能在仓库中的子目录并只稀疏检出该目录。
+        有镜像缓存时先增量更新本地镜像，再从镜像检出（depth 和 blob_filter 不再需要）。
+        安装的是技能的工作树，不含 .git；克隆和验证在临时目录中完成，失败时不影响已安装的技能。
+        """
         try:
             # 检查 git 是否可用
-            result = subprocess.run(
-                ['git', '--version'],
-                capture_output=True,
-                text=True
-            )
+            result = run_git(['--version'])
             if result.returncode != 0:
                 return False, "Git 未安装或不可用"
 
-            # 处理已存在的目标
-            if target_path.exists():
-                if backup:
-                    backup_path = target_path.parent / f"{target_path.name}.backup"
-                    if backup_path.exists():
-                        shutil.rmtree(backup_path)
-                    shutil.move(str(target_path), str(backup_path))
-                    print(f"已备份到: {backup_path}")
-                else:
-                    shutil.rmtree(target_path)
+            if subpath:
+                subpath = subpath.strip('/')
+                if Path(subpath).is_absolute() or '..' in Path(subpath).parts:
+                    return False, f"无效的子目录: {subpath}"
 
             # 创建父目录
             target_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # 克隆仓库
-            result = subprocess.run(
-                ['git', 'clone', git_url, str(target_path)],
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode != 0:
-                return False, f"Git 克隆失败: {result.stderr}"
-
-            # 验证技能
-            valid, msg = self.validate_skill(target_path)
-            if not valid:
-                shutil.rmtree(target_path)
-                return False, f"技能验证失败: {msg}"
+            self.resolver.invalidate(target_path.parent)
+
+            # 临时目录与目标在同一文件系统，完成后直接移动
+            work_dir = Path(tempfile.mkdtemp(prefix=f'.{target_path.name}.clone-', dir=target_path.parent))
+            try:
+                repo_dir = work_dir / 'repo'
+                started = time.perf_counter()
+                with _phase('git_clone'):
+                    if self.mirror_cache is not None:
+                        with self.mirror_cache.use(git_url) as (success, msg, transferred):
+                            if success:
+                                mirror = Path(msg)
+                                # 对象都在镜像中，不需要浅克隆或部分克隆
+                                success, msg = git_checkout(
+                                    repo_dir, str(mirror), revision, subpath,
+                                    depth=None, blob_filter=None, reference=mirror
+                                )
+                    else:
+                        success, msg = git_checkout(repo_dir, git_url, revision, subpath, depth, blob_filter)
+                        transferred = dir_size(repo_dir / '.git' / 'objects')
+                elapsed = time.perf_counter() - started
+                if not success:
+                    return False, msg
+                _count('git_bytes', transferred)
+
+                tree = repo_dir / subpath if subpath else repo_dir
+                if not tree.is_dir():
+                    return False, f"仓库中不存在目录: {subpath}"
+                shutil.rmtree(tree / '.git', ignore_errors=True)
+
+                # 以目标名称验证（验证规则要求目录名与技能名称一致）
+                skill_dir = work_dir / target_path.name
+                tree.rename(skill_dir)
+                valid, msg = self.validate_skill(skill_dir)
+                if not valid:
+                    return False, f"技能验证失败: {msg}"
+
+                # 处理已存在的目标
+                if target_path.exists():
+                    if backup:
+                        backup_path = target_path.parent / f"{target_path.name}.backup"
+                        if backup_path.exists():
+                            shutil.rmtree(backup_path)
+                        shutil.move(str(target_path), str(backup_path))
+                        print(f"已备份到: {backup_path}")
+                    else:
+                        shutil.rmtree(target_path)
+                skill_dir.rename(target_path)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
 
             # 设置脚本权限（Unix-like 系统）
             if os.name != 'nt':
@@ -311,11 +729,20 @@ class SkillInstaller:
                         if script.is_file() and script.suffix in ['.sh', '.py']:
                             script.chmod(0o755)
 
-            return True, f"成功从 Git 安装到: {target_path}"
+            self.update_manifest(target_path)
+            return True, f"成功从 Git 安装到: {target_path} (传输 {format_bytes(transferred)}，克隆耗时 {elapsed:.2f}s)"
 
         except Exception as e:
             return False, f"安装失败: {str(e)}"
 
+    def update_manifest(self, target_path: Path):
+        """更新目标根目录的技能清单（根目录已有清单且 skill-lister 可用时）"""
+        if update_manifest is None:
+            return
+        with self._manifest_lock:
+            if update_manifest(target_path):
+                print(f"已更新技能清单: {target_path.parent}")
+
     def check_permissions(self, path: Path, level: str) -> Tuple[bool, str]:
         """检查是否有足够的权限"""
         if level == 'system' and os.name != 'nt':
@@ -338,7 +765,7 @@ class SkillInstaller:
         return True, "权限检查通过"
 
 
-def interactive_install():
+def interactive_install(mirror_cache: Optional[GitMirrorCache] = None, store: Optional[SkillStore] = None):
     """交互式安装"""
     print("=== Agent Skill Installer ===\n")
 
@@ -365,7 +792,7 @@ def interactive_install():
     else:
         standard = standard_map[standard_choice]
 
-    installer = SkillInstaller(standard=standard)
+    installer = SkillInstaller(standard=standard, mirror_cache=mirror_cache, store=store)
     config = STANDARD_CONFIG[standard]
     print(f"\n✓ 已选择: {config['display_name']}\n")
 
@@ -385,7 +812,9 @@ def interactive_install():
         is_git = False
     elif source_type == '2':
         git_url = input("Git 仓库 URL: ").strip()
-        skill_name = Path(git_url).stem
+        subpath = input("技能在仓库中的子目录 (可选，直接回车表示仓库根目录): ").strip().strip('/') or None
+        revision = input("分支、标签或提交 (可选，默认为默认分支): ").strip() or None
+        skill_name = Path(subpath).name if subpath else Path(git_url).stem
         is_git = True
     else:
         print("❌ 无效的选择")
@@ -464,7 +893,7 @@ def interactive_install():
     print(f"\n安装中...")
 
     if is_git:
-        success, msg = installer.install_from_git(git_url, target_path, backup)
+        success, msg = installer.install_from_git(git_url, target_path, backup, revision, subpath)
     else:
         success, msg = installer.install_from_local(source_path, target_path, backup)
 
@@ -472,10 +901,7 @@ def interactive_install():
         print(f"\n✅ {msg}")
 
         # 读取技能描述
-        skill_md = target_path / 'SKILL.md'
-        content = skill_md.read_text(encoding='utf-8')
-        parts = content.split('---', 2)
-        frontmatter = yaml.safe_load(parts[1])
+        frontmatter = parse_frontmatter(read_frontmatter(target_path / 'SKILL.md'))
         description = frontmatter.get('description', '')
 
         print(f"\n技能信息:")
@@ -494,9 +920,337 @@ def interactive_install():
         return 1
 
 
+def load_lockfile(lock_path: Path) -> List[Dict]:
+    """读取技能锁定文件，返回规范化后的条目列表；格式错误时抛出 ValueError
+
+    每个条目包含 source（本地路径或 Git URL），可选 name、standard、level、
+    revision（Git 提交、标签或分支）、path（技能在 Git 仓库中的子目录）、
+    depth（Git 浅克隆深度，0 表示完整历史）和 hash（tree_hash 计算的内容哈希）。
+    相对路径的本地源以锁定文件所在目录为基准。
+    """
+    with open(lock_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    items = data.get('skills') if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("锁定文件必须包含 skills 列表")
+
+    standards = {standard.value: standard for standard in SkillStandard}
+    entries = []
+    for i, item in enumerate(items, 1):
+        if not isinstance(item, dict) or not item.get('source'):
+            raise ValueError(f"第 {i} 个条目缺少 source")
+        source = str(item['source'])
+        git = is_git_source(source)
+        if not git:
+            source = str((lock_path.parent / Path(source).expanduser()).resolve())
+
+        standard = str(item.get('standard', SkillStandard.AGENTSKILLS.value)).lower()
+        if standard not in standards:
+            raise ValueError(f"第 {i} 个条目的规范无效: {standard}")
+        level = item.get('level', 'user')
+        if level not in SkillInstaller.INSTALL_LEVELS:
+            raise ValueError(f"第 {i} 个条目的安装级别无效: {level}")
+
+        subpath = str(item['path']).strip('/') if git and item.get('path') else None
+        if subpath:
+            default_name = Path(subpath).name
+        else:
+            # 只去掉 Git URL 的 .git 后缀，本地目录名可能包含点（如 my.skill）
+            default_name = Path(source.rstrip('/')).name
+            if git and default_name.endswith('.git'):
+                default_name = default_name[:-len('.git')]
+        entries.append({
+            'name': str(item.get('name') or default_name),
+            'source': source,
+            'git': git,
+            'standard': standards[standard],
+            'level': level,
+            'revision': str(item['revision']) if item.get('revision') else None,
+            'path': subpath,
+            'depth': int(item.get('depth', 1)) or None,
+            'hash': item.get('hash'),
+        })
+    return entries
+
+
+def install_entry(
+    entry: Dict,
+    installer: SkillInstaller,
+    target_path: Path,
+    backup: bool = False,
+    record_hash: bool = False
+) -> Dict:
+    """安装锁定文件中的一个技能，返回结果 {status, message, hash, seconds}
+
+    status 为 installed、skipped（已安装内容与锁定的哈希一致）或 failed。
+    锁定了哈希或 record_hash 为真时，安装后计算并校验内容哈希。
+    """
+    started = time.perf_counter()
+
+    def result(status: str, message: str, digest: Optional[str] = None) -> Dict:
+        return {
+            'status': status,
+            'message': message,
+            'hash': digest,
+            'seconds': time.perf_counter() - started,
+        }
+
+    locked = entry['hash']
+    try:
+        if locked and target_path.is_dir():
+            with _phase('hash'):
+                installed = tree_hash(target_path)
+            if installed == locked:
+                return result('skipped', "已是锁定的版本", installed)
+
+        has_permission, message = installer.check_permissions(target_path, entry['level'])
+        if not has_permission:
+            return result('failed', message)
+
+        if entry['git']:
+            success, message = installer.install_from_git(
+                entry['source'], target_path, backup,
+                revision=entry['revision'], subpath=entry['path'], depth=entry['depth']
+            )
+        else:
+            source_path = Path(entry['source'])
+            if locked and source_path.is_dir():
+                # 本地源在复制前校验，避免用不一致的内容覆盖已安装的技能
+                with _phase('hash'):
+                    digest = tree_hash(source_path)
+                if digest != locked:
+                    return result('failed', f"源内容与锁定的哈希不一致: {digest}")
+            success, message = installer.install_from_local(source_path, target_path, backup)
+        if not success:
+            return result('failed', message)
+
+        if not (locked or record_hash):
+            return result('installed', message)
+        with _phase('hash'):
+            digest = tree_hash(target_path)
+        if locked and digest != locked:
+            shutil.rmtree(target_path)
+            return result('failed', f"安装后的内容与锁定的哈希不一致: {digest}")
+        return result('installed', message, digest)
+
+    except Exception as e:
+        return result('failed', f"安装失败: {str(e)}")
+
+
+def batch_install(
+    lock_path: Path,
+    jobs: int = 4,
+    backup: bool = False,
+    update_lock: bool = False,
+    mirror_cache: Optional[GitMirrorCache] = None,
+    store: Optional[SkillStore] = None
+) -> int:
+    """按锁定文件批量安装技能（非交互，线程池并发），输出每个技能的结果"""
+    try:
+        entries = load_lockfile(lock_path)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"❌ 无法读取锁定文件 {lock_path}: {e}")
+        return 1
+
+    # 每种规范一个安装器，共用根目录解析器
+    resolver = SkillRootResolver()
+    installers = {}
+    jobs_by_target = {}
+    results = [None] * len(entries)
+    for i, entry in enumerate(entries):
+        installer = installers.get(entry['standard'])
+        if installer is None:
+            installer = installers[entry['standard']] = SkillInstaller(
+                entry['standard'], resolver, mirror_cache, store
+            )
+        try:
+            target_path = installer.get_install_path(entry['level'], entry['name'])
+        except ValueError as e:
+            results[i] = {'status': 'failed', 'message': str(e), 'hash': None, 'seconds': 0.0}
+            continue
+        entry['target'] = target_path
+        if target_path in jobs_by_target:
+            message = f"与第 {jobs_by_target[target_path] + 1} 个条目的安装位置相同"
+            results[i] = {'status': 'failed', 'message': message, 'hash': None, 'seconds': 0.0}
+            continue
+        jobs_by_target[target_path] = i
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    print(f"安装 {len(entries)} 个技能 (并发数 {jobs})...\n")
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {}
+        for i in jobs_by_target.values():
+            entry = entries[i]
+            futures[i] = executor.submit(
+                install_entry, entry, installers[entry['standard']], entry['target'], backup, update_lock
+            )
+        for i, future in futures.items():
+            results[i] = future.result()
+
+    icons = {'installed': '✅', 'skipped': '⏭️ ', 'failed': '❌'}
+    counts = dict.fromkeys(icons, 0)
+    for entry, result in zip(entries, results):
+        counts[result['status']] += 1
+        label = f"{entry['name']} ({entry['level']}-{STANDARD_CONFIG[entry['standard']]['name']})"
+        print(f"{icons[result['status']]} {label}: {result['message']} ({result['seconds']:.2f}s)")
+
+    print(f"\n总结: {len(entries)} 个技能，{counts['installed']} 个已安装，"
+          f"{counts['skipped']} 个已跳过，{counts['failed']} 个失败")
+
+    if update_lock:
+        write_lock_hashes(lock_path, results)
+
+    return 1 if counts['failed'] else 0
+
+
+def write_lock_hashes(lock_path: Path, results: List[Dict]):
+    """把已安装技能的内容哈希写回锁定文件（注释不会保留）"""
+    with open(lock_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    for item, result in zip(data['skills'], results):
+        if result['hash']:
+            item['hash'] = result['hash']
+    tmp_path = lock_path.with_name(lock_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+    os.replace(tmp_path, lock_path)
+    print(f"已更新锁定文件: {lock_path}")
+
+
+def parse_size(text: str) -> int:
+    """解析大小参数，支持 K/M/G 后缀（如 500M）"""
+    text = text.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    try:
+        if text and text[-1] in units:
+            return int(float(text[:-1]) * units[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的大小: {text}")
+
+
+def prune_mirrors(mirror_cache: GitMirrorCache) -> int:
+    """清理 Git 镜像缓存并报告结果"""
+    removed, remaining = mirror_cache.prune()
+    for item in removed:
+        print(f"已删除镜像: {item['path']} ({format_bytes(item['size'])})")
+    print(f"镜像缓存: {mirror_cache.root} (共 {format_bytes(remaining)}，上限 {format_bytes(mirror_cache.max_bytes)})")
+    return 0
+
+
+def gc_store(store: SkillStore) -> int:
+    """回收存储中未被引用的对象并报告结果"""
+    removed, freed, remaining = store.gc()
+    print(f"已删除 {removed} 个未引用的对象，释放 {format_bytes(freed)}")
+    print(f"技能存储: {store.root} (共 {format_bytes(remaining)})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='安装 Agent Skills')
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='-',
+        metavar='FILE',
+        help='输出分阶段计时和操作计数的 JSON 报告（默认写到 stderr）'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='同时用 cProfile 记录函数级耗时并写入 FILE（可用 pstats 查看）'
+    )
+    parser.add_argument(
+        '--batch',
+        metavar='LOCKFILE',
+        help='按锁定文件批量安装技能（非交互）'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=4,
+        help='批量安装的并发数 (默认: 4)'
+    )
+    parser.add_argument(
+        '-b', '--backup',
+        action='store_true',
+        help='批量安装时覆盖前备份现有技能'
+    )
+    parser.add_argument(
+        '--update-lock',
+        action='store_true',
+        help='批量安装后把已安装技能的内容哈希写回锁定文件'
+    )
+    parser.add_argument(
+        '--no-mirror',
+        action='store_true',
+        help='不使用本地 Git 镜像缓存，每次直接从远程获取'
+    )
+    parser.add_argument(
+        '--mirror-max-size',
+        type=parse_size,
+        default=DEFAULT_MAX_BYTES,
+        metavar='SIZE',
+        help='Git 镜像缓存的大小上限，超出时淘汰最久未使用的镜像 (默认: 2G)'
+    )
+    parser.add_argument(
+        '--prune-mirrors',
+        action='store_true',
+        help='清理 Git 镜像缓存后退出（按 --mirror-max-size 淘汰）'
+    )
+    parser.add_argument(
+        '--no-store',
+        action='store_true',
+        help='本地安装时直接复制，不使用内容寻址存储'
+    )
+    parser.add_argument(
+        '--hardlink',
+        action='store_true',
+        help='不支持 reflink 时以只读硬链接安装存储中的文件（默认复制）'
+    )
+    parser.add_argument(
+        '--gc',
+        action='store_true',
+        help='回收内容寻址存储中未被任何安装硬链接的对象后退出（未使用 --hardlink 时回收全部对象）'
+    )
+    args = parser.parse_args()
+
+    if args.profile and skill_profile is None:
+        print("⚠️  未找到 skill-lister，--profile 不可用", file=sys.stderr)
+    profiler = skill_profile.enable() if args.profile and skill_profile is not None else None
+    tracer = None
+    if args.trace:
+        import cProfile
+        tracer = cProfile.Profile()
+        tracer.enable()
+
+    try:
+        if args.prune_mirrors:
+            return prune_mirrors(GitMirrorCache(max_bytes=args.mirror_max_size))
+        if args.gc:
+            return gc_store(SkillStore())
+        mirror_cache = None if args.no_mirror else GitMirrorCache(max_bytes=args.mirror_max_size)
+        # Windows 上无法删除只读文件，不使用存储
+        store = None if args.no_store or os.name == 'nt' else SkillStore(hardlink=args.hardlink)
+        if args.batch:
+            return batch_install(Path(args.batch), args.jobs, args.backup, args.update_lock, mirror_cache, store)
+        return interactive_install(mirror_cache, store)
+    finally:
+        if tracer is not None:
+            tracer.disable()
+            tracer.dump_stats(args.trace)
+        if profiler is not None:
+            text = json.dumps(profiler.report(), indent=2, ensure_ascii=False)
+            if args.profile == '-':
+                print(text, file=sys.stderr)
+            else:
+                Path(args.profile).write_text(text + '\n', encoding='utf-8')
+
+
 if __name__ == "__main__":
     try:
-        sys.exit(interactive_install())
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n\n已取消")
         sys.exit(1)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Skill Store
+
+按内容寻址的技能文件存储。安装时每个文件按 SHA-256 在 objects/ 中只保存一份，
+再以 reflink（文件系统支持写时复制时）或复制的方式放到安装目录；同一技能安装到多个规范
+或多个项目时，reflink 得到的文件共享数据块，不再占用多份空间。reflink 是写时复制的，
+编辑已安装的文件不会影响存储或其他安装。
+
+硬链接需要显式启用（hardlink=True）：硬链接与存储中的对象共用 inode，对象是只读的
+（0444，可执行文件 0555），但 root 或强制覆盖的编辑器仍可能就地修改，影响所有共用该对象的安装。
+与安装共用 inode 的对象在复用前会校验内容哈希，被改写的对象会重新写入，不会传给新的安装。
+
+每个目标文件系统只探测一次：与存储不在同一文件系统、或不支持 reflink 且未启用硬链接时，
+完全不经过存储，直接从源文件复制（不计算哈希，也不写入对象）。
+没有任何安装链接的对象（链接数为 1）可以用 gc() 回收；reflink 安装的文件不依赖对象，
+未使用硬链接时 gc() 会回收全部对象。
+
+    from skill_store import SkillStore
+    store = SkillStore()
+    stats = store.materialize(source_path, target_path)
+"""
+
+import os
+import sys
+import stat
+import errno
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows：不加锁，不支持 reflink
+    fcntl = None
+
+
+# 放置文件的方式，按优先级排列
+METHODS = ('reflink', 'hardlink', 'copy')
+
+# Linux ioctl FICLONE：让目标文件与源文件共享数据块（btrfs、XFS 等）
+FICLONE = 0x40049409
+
+
+def get_store_dir() -> Path:
+    """获取技能文件存储目录"""
+    if 'AGENT_SKILLS_STORE_DIR' in os.environ:
+        return Path(os.environ['AGENT_SKILLS_STORE_DIR'])
+    return Path.home() / '.agent-skills' / '.store'
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def reflink(source: Path, dest: Path):
+    """以 reflink 复制文件，文件系统不支持时抛出 OSError"""
+    if fcntl is None or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, '当前平台不支持 reflink')
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+class SkillStore:
+    """按内容寻址的技能文件存储（线程安全；安装与 gc 之间通过文件锁协调）"""
+
+    def __init__(self, root: Optional[Path] = None, hardlink: bool = False):
+        self.root = root or get_store_dir()
+        # 放置方式（硬链接与对象共用 inode，需要显式启用）
+        self.methods = tuple(m for m in METHODS if hardlink or m != 'hardlink')
+        # 各目标文件系统上已确认不可用的放置方式 {st_dev: {方式}}
+        self._unsupported = {}
+        # 已探测过的目标文件系统
+        self._probed = set()
+        self._guard = threading.Lock()
+
+    def object_path(self, digest: str, executable: bool) -> Path:
+        # 硬链接共享权限位，可执行与否不同的相同内容分别保存
+        return self.root / 'objects' / digest[:2] / (digest[2:] + ('.x' if executable else ''))
+
+    @contextmanager
+    def _lock(self, exclusive: bool = False) -> Iterator[None]:
+        """安装时持有共享锁，gc 时持有排他锁（不会删除正在放置的对象）"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / '.lock', 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def add(self, source: Path, executable: bool, st: Optional[os.stat_result] = None) -> Tuple[Path, bool]:
+        """把文件存入存储，返回 (对象路径, 是否新写入)
+
+        内容相同的对象已存在时直接复用。对象还有硬链接安装（链接数大于 1）时可能被就地编辑过，
+        先校验哈希，不一致则重新写入，已有的硬链接仍指向旧的 inode。
+        """
+        st = st or source.stat()
+        digest = file_digest(source)
+        obj = self.object_path(digest, executable)
+        try:
+            ost = obj.stat()
+            if ost.st_size == st.st_size and (ost.st_nlink <= 1 or file_digest(obj) == digest):
+                return obj, False
+        except FileNotFoundError:
+            pass
+
+        # 先写临时文件再改名，并发存入同一内容时不会出现不完整的对象
+        tmp_dir = self.root / 'tmp'
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.chmod(tmp, 0o555 if executable else 0o444)
+            os.replace(tmp, obj)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return obj, True
+
+    def _methods(self, dev: int):
+        with self._guard:
+            unsupported = set(self._unsupported.get(dev, ()))
+        return [method for method in self.methods if method not in unsupported]
+
+    def _disable(self, dev: int, method: str):
+        with self._guard:
+            self._unsupported.setdefault(dev, set()).add(method)
+
+    def _place(self, path: Path, dest: Path, dev: int, st: os.stat_result, mode: int, executable: bool) -> str:
+        """把源文件经由存储放到 dest，返回实际使用的方式"""
+        obj = created = None
+        for method in self._methods(dev):
+            if method == 'copy':
+                break
+            if obj is None:
+                obj, created = self.add(path, executable, st)
+            try:
+                if method == 'reflink':
+                    reflink(obj, dest)
+                else:
+                    os.link(obj, dest)
+                    return method
+            except OSError as e:
+                dest.unlink(missing_ok=True)
+                # 链接数达到上限只影响这个对象，其他错误说明该文件系统不支持这种方式
+                if e.errno != errno.EMLINK:
+                    self._disable(dev, method)
+                continue
+            os.chmod(dest, mode)
+            os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+            return method
+
+        # 无法共享：直接从源文件复制，本次新写入的对象没有安装使用，随即删除
+        if created:
+            obj.unlink(missing_ok=True)
+        shutil.copyfile(path, dest)
+        os.chmod(dest, mode)
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        return 'copy'
+
+    def materialize(
+        self,
+        source: Path,
+        target: Path,
+        is_script: Optional[Callable[[Path], bool]] = None
+    ) -> Dict[str, int]:
+        """把源目录经由存储放到 target（target 不能已存在），返回各放置方式的文件数
+
+        与 shutil.copytree 一样跟随符号链接。is_script(相对路径) 为真的文件以 0755 安装
+        （硬链接时为只读的 0555）。
+        """
+        stats = dict.fromkeys(METHODS, 0)
+        with self._lock():
+            target.mkdir(parents=True)
+            dev = self._target_dev(target)
+            for dirpath, dirnames, filenames in os.walk(source, followlinks=True):
+                relative = Path(dirpath).relative_to(source)
+                target_dir = target / relative
+                for dirname in dirnames:
+                    (target_dir / dirname).mkdir()
+                for filename in filenames:
+                    script = is_script is not None and is_script(relative / filename)
+                    stats[self._put(Path(dirpath, filename), target_dir / filename, dev, script)] += 1
+        return stats
+
+    def place(self, path: Path, dest: Path, script: bool = False) -> str:
+        """把单个文件经由存储放到 dest（dest 不能已存在），返回放置方式"""
+        with self._lock():
+            return self._put(path, dest, self._target_dev(dest.parent), script)
+
+    def _target_dev(self, target_dir: Path) -> int:
+        """目标所在的文件系统，首次遇到时探测可用的放置方式
+
+        与存储不在同一文件系统时 reflink 和硬链接都不可用（EXDEV）；同一文件系统上用一个
+        临时文件试探 reflink。两者都不可用时该文件系统上的安装不经过存储。
+        """
+        dev = target_dir.stat().st_dev
+        with self._guard:
+            if dev in self._probed:
+                return dev
+            self._probed.add(dev)
+        if dev != self.root.stat().st_dev:
+            for method in METHODS[:-1]:
+                self._disable(dev, method)
+        elif 'reflink' in self.methods and not self._probe_reflink(target_dir):
+            self._disable(dev, 'reflink')
+        return dev
+
+    def _probe_reflink(self, target_dir: Path) -> bool:
+        tmp_dir = self.root / 'tmp'
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, source = tempfile.mkstemp(dir=tmp_dir)
+        os.write(fd, b'\0')
+        os.close(fd)
+        fd, dest = tempfile.mkstemp(dir=target_dir, prefix='.reflink-probe-')
+        os.close(fd)
+        try:
+            reflink(Path(source), Path(dest))
+            return True
+        except OSError:
+            return False
+        finally:
+            os.unlink(source)
+            os.unlink(dest)
+
+    def _put(self, path: Path, dest: Path, dev: int, script: bool) -> str:
+        st = path.stat()
+        mode = 0o755 if script else stat.S_IMODE(st.st_mode)
+        return self._place(path, dest, dev, st, mode, script or bool(mode & 0o111))
+
+    def gc(self) -> Tuple[int, int, int]:
+        """删除没有被任何安装链接的对象和中断遗留的临时文件，返回 (删除数, 释放字节数, 剩余字节数)
+
+        以 reflink 或复制方式安装的文件不引用对象，对应的对象同样会被回收。
+        """
+        removed = freed = remaining = 0
+        with self._lock(exclusive=True):
+            # 持有排他锁时没有正在进行的安装，临时文件都是遗留的
+            shutil.rmtree(self.root / 'tmp', ignore_errors=True)
+            objects = self.root / 'objects'
+            if not objects.is_dir():
+                return 0, 0, 0
+            for subdir in objects.iterdir():
+                for obj in subdir.iterdir():
+                    st = obj.lstat()
+                    if st.st_nlink > 1:
+                        remaining += st.st_size
+                        continue
+                    obj.unlink()
+                    removed += 1
+                    freed += st.st_size
+                try:
+                    subdir.rmdir()
+                except OSError:
+                    pass
+        return removed, freed, remaining
+
@@ -10,13 +10,24 @@ import os
 import re
 import sys
 import json
+import heapq
+import socket
+import hashlib
 import argparse
+import time
+import itertools
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TextIO
 from enum import Enum
-import yaml
 from datetime import datetime
 
+from skill_index import SearchIndex, TrigramIndex, index_signature
+from skill_budget import list_references, measure_skill, reference_signature, sum_budgets
+import skill_profile
+from skill_profile import profiled
+
 
 class SkillStandard(Enum):
     """技能规范标准"""
@@ -52,94 +63,555 @@ STANDARD_CONFIG = {
 }
 
 
+# frontmatter 大小上限，防止格式错误的 SKILL.md 导致读取整个文件
+MAX_FRONTMATTER_BYTES = 64 * 1024
+
+
+class FrontmatterError(ValueError):
+    """SKILL.md frontmatter 格式错误"""
+
+
+def read_frontmatter(skill_md: Path, max_bytes: int = MAX_FRONTMATTER_BYTES) -> str:
+    """逐行读取 SKILL.md 的 YAML frontmatter
+
+    读到结束的 --- 即停止，不会读取正文；超过 max_bytes 时抛出 FrontmatterError。
+    """
+    with open(skill_md, 'rb') as f:
+        first = f.readline(max_bytes + 1)
+        if not first.startswith(b'---'):
+            raise FrontmatterError("SKILL.md 必须以 YAML frontmatter 开头")
+
+        chunks = [first[3:]]
+        size = len(first)
+        while True:
+            line = f.readline(max_bytes + 1 - size)
+            if not line:
+                raise FrontmatterError("YAML frontmatter 格式错误")
+            if line.startswith(b'---'):
+                break
+            size += len(line)
+            if size > max_bytes:
+                raise FrontmatterError(f"YAML frontmatter 超过大小上限 ({max_bytes} 字节)")
+            chunks.append(line)
+
+    return b''.join(chunks).decode('utf-8')
+
+
+_SIMPLE_KEY = re.compile(r'^[A-Za-z_][A-Za-z0-9_-]*$')
+# YAML 1.1 中会被解析为布尔值或 null 的单词
+_RESERVED_WORDS = frozenset(
+    'y Y yes Yes YES n N no No NO true True TRUE false False FALSE '
+    'on On ON off Off OFF null Null NULL'.split()
+)
+# 以这些字符开头的纯量可能是数字、时间、特殊语法或引号字符串，交给完整 YAML 解析
+_SPECIAL_FIRST_CHARS = frozenset('0123456789+-.~=<?:,[]{}#&*!|>\'"%@`')
+# 控制字符和 YAML 视为换行的字符交给完整 YAML 解析；\r 只允许出现在 \r\n 行尾
+_CONTROL_CHARS = re.compile('[\x00-\x08\t\x0b\x0c\x0e-\x1f\x7f\x85\u2028\u2029\ufeff]|\r(?!\n)')
+
+
+def _parse_simple_scalar(value: str) -> Optional[str]:
+    """解析简单纯量，只接受必然被 YAML 解析为字符串的值，否则返回 None"""
+    value = value.strip()
+    if not value or value in _RESERVED_WORDS:
+        return None
+    first = value[0]
+    if first in '"\'':
+        # 不含转义和内部引号的引号字符串
+        inner = value[1:-1]
+        if len(value) >= 2 and value[-1] == first and first not in inner and '\\' not in inner:
+            return inner
+        return None
+    if first in _SPECIAL_FIRST_CHARS or value.endswith(':'):
+        return None
+    if ': ' in value or ' #' in value or '\t' in value:
+        return None
+    return value
+
+
+def _parse_simple_frontmatter(text: str) -> Optional[Dict]:
+    """快速解析 generate_frontmatter 生成的扁平格式
+
+    支持顶层 key: value 和一层嵌套映射（如 metadata:），遇到其他写法返回 None。
+    """
+    if _CONTROL_CHARS.search(text):
+        return None
+
+    result = {}
+    nested = None
+    nested_key = None
+    nested_indent = None
+
+    for line in text.split('\n'):
+        line = line.rstrip('\r')
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+
+        indent = len(line) - len(line.lstrip(' '))
+        key, sep, rest = stripped.partition(':')
+        if not sep or (rest and rest[0] != ' ') or not _SIMPLE_KEY.match(key) or key in _RESERVED_WORDS:
+            return None
+
+        if indent:
+            # 嵌套映射只允许一层且缩进一致
+            if nested_key is None or (nested_indent is not None and indent != nested_indent):
+                return None
+            nested_indent = indent
+            value = _parse_simple_scalar(rest)
+            if value is None:
+                return None
+            if nested is None:
+                nested = result[nested_key] = {}
+            nested[key] = value
+            continue
+
+        if nested_key is not None and nested is None:
+            result[nested_key] = None
+        nested = nested_key = nested_indent = None
+
+        if not rest.strip():
+            nested_key = key
+            continue
+
+        value = _parse_simple_scalar(rest)
+        if value is None:
+            return None
+        result[key] = value
+
+    if nested_key is not None and nested is None:
+        result[nested_key] = None
+
+    return result or None
+
+
+def parse_frontmatter(header: str):
+    """解析 frontmatter 文本
+
+    简单格式走快速路径，其余交给完整 YAML 解析（有 libyaml 时使用 CSafeLoader）。
+    PyYAML 在首次需要时才导入，守护进程客户端和全部命中快速路径的扫描无需加载它。
+    YAML 语法错误以 FrontmatterError 抛出。
+    """
+    result = _parse_simple_frontmatter(header)
+    if result is not None:
+        return result
+
+    skill_profile.count('yaml_full_parses')
+    import yaml
+    try:
+        return yaml.load(header, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    except yaml.YAMLError as e:
+        raise FrontmatterError(f"YAML 解析错误: {e}") from e
+
+
+def get_cache_dir() -> Path:
+    """获取缓存目录"""
+    if 'AGENT_SKILLS_CACHE_DIR' in os.environ:
+        return Path(os.environ['AGENT_SKILLS_CACHE_DIR'])
+    return Path.home() / '.agent-skills' / '.cache'
+
+
+def get_registry_socket() -> Path:
+    """获取技能注册表守护进程的 Unix socket 路径"""
+    if 'AGENT_SKILLS_REGISTRY_SOCKET' in os.environ:
+        return Path(os.environ['AGENT_SKILLS_REGISTRY_SOCKET'])
+    return get_cache_dir() / 'registry.sock'
+
+
+@profiled('registry_query')
+def query_registry(
+    request: Dict,
+    socket_path: Optional[Path] = None,
+    timeout: float = 2.0
+) -> Optional[Dict]:
+    """向技能注册表守护进程发送一条请求
+
+    协议为一行 JSON 请求、一行 JSON 响应。守护进程未运行、无响应或返回错误时返回 None，
+    调用方回退到本地扫描。
+    """
+    socket_path = socket_path or get_registry_socket()
+    if not hasattr(socket, 'AF_UNIX') or not socket_path.exists():
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        response = json.loads(line)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(response, dict) or 'error' in response:
+        return None
+    return response
+
+
+class SkillCache:
+    """技能元数据缓存
+
+    以技能目录路径为键，记录 SKILL.md 的 mtime/size/inode 以及技能目录的 mtime。
+    状态未变化的技能直接从缓存读取，新增或修改过的技能才会重新解析。
+    """
+
+    VERSION = 3
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = cache_path or get_cache_dir() / 'skills-cache.json'
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @profiled('cache_load')
+    def load(self):
+        """从磁盘加载缓存，文件缺失或损坏时视为空缓存"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                skill_profile.count('reads')
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self.entries = data.get('entries', {})
+
+    @profiled('cache_save')
+    def save(self):
+        """原子写入缓存文件（仅在有变化时）"""
+        if not self.dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        data = {'version': self.VERSION, 'entries': self.entries}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    @staticmethod
+    def make_key(skill_path: Path) -> Optional[List[int]]:
+        """计算缓存键，SKILL.md 不存在时返回 None（不缓存）"""
+        skill_profile.count('stats', 2)
+        try:
+            st = os.stat(skill_path / 'SKILL.md')
+            dir_st = os.stat(skill_path)
+        except OSError:
+            return None
+        return [st.st_mtime_ns, st.st_size, st.st_ino, dir_st.st_mtime_ns]
+
+    def get(self, skill_path: Path, key: Optional[List[int]]) -> Optional[Dict]:
+        """查找缓存，命中时返回已解析的字段"""
+        with self._lock:
+            entry = self.entries.get(str(skill_path))
+            if key is not None and entry is not None and entry.get('key') == key:
+                self.hits += 1
+                return entry['data']
+            self.misses += 1
+            return None
+
+    def put(self, skill_path: Path, key: Optional[List[int]], data: Dict):
+        """写入缓存"""
+        if key is None:
+            return
+        with self._lock:
+            self.entries[str(skill_path)] = {'key': key, 'data': data}
+            self.dirty = True
+
+    def update(self, skill_path: Path, data: Dict):
+        """把字段补充到已有的技能条目中（如渲染时才检查的目录结构）"""
+        with self._lock:
+            entry = self.entries.get(str(skill_path))
+            if entry is not None:
+                entry['data'].update(data)
+                self.dirty = True
+
+    def get_extra(self, skill_path: Path, field: str, key) -> Optional[Dict]:
+        """查找附加在技能条目上的派生数据（如上下文成本），条目被重写时随之失效"""
+        with self._lock:
+            entry = self.entries.get(str(skill_path))
+            extra = entry.get(field) if entry is not None else None
+            if extra is not None and extra.get('key') == key:
+                return extra['data']
+            return None
+
+    def put_extra(self, skill_path: Path, field: str, key, data: Dict):
+        """把派生数据附加到已有的技能条目上"""
+        with self._lock:
+            entry = self.entries.get(str(skill_path))
+            if entry is not None:
+                entry[field] = {'key': key, 'data': data}
+                self.dirty = True
+
+    def invalidate(self, skill_path: Optional[Path] = None):
+        """使缓存失效：指定路径则只删除该技能，否则清空全部"""
+        if skill_path is None:
+            if self.entries:
+                self.entries = {}
+                self.dirty = True
+        elif self.entries.pop(str(skill_path), None) is not None:
+            self.dirty = True
+
+    def retain(self, root: Path, seen: List[Path]):
+        """删除某个根目录下已不存在的技能条目"""
+        prefix = str(root).rstrip(os.sep) + os.sep
+        keep = {str(p) for p in seen}
+        with self._lock:
+            stale = [p for p in self.entries if p.startswith(prefix) and p not in keep]
+            for p in stale:
+                del self.entries[p]
+            if stale:
+                self.dirty = True
+
+
+def _lazy_field(field: str, layout: bool = False) -> property:
+    """生成延迟解析的属性：首次访问时解析 frontmatter（或检查目录结构）并填充对应的 slot"""
+    slot = '_' + field
+    flag, resolver = ('_layout_resolved', '_resolve_layout') if layout else ('_parsed', '_resolve_meta')
+
+    def fget(self):
+        if not getattr(self, flag):
+            getattr(self, resolver)()
+        return getattr(self, slot)
+
+    def fset(self, value):
+        setattr(self, slot, value)
+
+    return property(fget, fset)
+
+
+def _count_entries(path: Path) -> int:
+    """统计目录中的条目数量"""
+    skill_profile.count('dirs_listed')
+    try:
+        with os.scandir(path) as entries:
+            return sum(1 for _ in entries)
+    except OSError:
+        return 0
+
+
 class SkillInfo:
-    """技能信息类"""
+    """技能信息类
 
-    def __init__(self, path: Path, level: str):
+    path/level 来自目录项，frontmatter 在首次访问元数据属性时才解析，
+    目录结构标志 (has_scripts 等) 在首次访问时才检查。
+    使用 __slots__ 布局以降低大量技能时的内存占用。
+    """
+
+    # frontmatter 字段
+    META_FIELDS = (
+        'name', 'description', 'version', 'author', 'license', 'compatibility',
+        'metadata', 'allowed_tools', 'is_valid', 'errors', 'warnings'
+    )
+    # 目录结构字段
+    LAYOUT_FIELDS = ('has_scripts', 'has_references', 'has_assets')
+    # 可缓存的已解析字段
+    CACHED_FIELDS = META_FIELDS + LAYOUT_FIELDS
+
+    __slots__ = (
+        'path', 'level', '_cache', '_parsed', '_layout_resolved', '_script_count', '_reference_count'
+    ) + tuple('_' + field for field in META_FIELDS + LAYOUT_FIELDS)
+
+    name = _lazy_field('name')
+    description = _lazy_field('description')
+    version = _lazy_field('version')
+    author = _lazy_field('author')
+    license = _lazy_field('license')
+    compatibility = _lazy_field('compatibility')
+    metadata = _lazy_field('metadata')
+    allowed_tools = _lazy_field('allowed_tools')
+    is_valid = _lazy_field('is_valid')
+    errors = _lazy_field('errors')
+    warnings = _lazy_field('warnings')
+    has_scripts = _lazy_field('has_scripts', layout=True)
+    has_references = _lazy_field('has_references', layout=True)
+    has_assets = _lazy_field('has_assets', layout=True)
+
+    def __init__(
+        self,
+        path: Path,
+        level: str,
+        cached: Optional[Dict] = None,
+        cache: Optional[SkillCache] = None
+    ):
         self.path = path
         self.level = level
-        self.name = ""
-        self.description = ""
-        self.version = None
-        self.author = None
-        self.license = None
-        self.compatibility = None
-        self.metadata = {}
-        self.allowed_tools = []
-        self.has_scripts = False
-        self.has_references = False
-        self.has_assets = False
-        self.is_valid = False
-        self.errors = []
-        self.warnings = []
+        self._cache = cache
+        self._parsed = False
+        self._layout_resolved = False
+        self._script_count = self._reference_count = None
+
+        if cached is not None:
+            self._load(cached)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SkillInfo':
+        """从 to_dict() 的输出（如注册表守护进程的响应）重建技能信息"""
+        return cls(Path(data['path']), data['level'], cached=data)
+
+    # 文件数量不缓存：在 scripts/ 或 references/ 中增删文件不会改变缓存键，首次访问时才统计
+    @property
+    def script_count(self) -> int:
+        if self._script_count is None:
+            self._script_count = _count_entries(self.path / 'scripts') if self.has_scripts else 0
+        return self._script_count
+
+    @property
+    def reference_count(self) -> int:
+        if self._reference_count is None:
+            self._reference_count = _count_entries(self.path / 'references') if self.has_references else 0
+        return self._reference_count
+
+    @property
+    def dir_name(self) -> str:
+        """目录名（无需解析 frontmatter）"""
+        return self.path.name
+
+    def resolve(self) -> 'SkillInfo':
+        """立即解析所有字段"""
+        if not self._parsed:
+            self._resolve_meta()
+        if not self._layout_resolved:
+            self._resolve_layout()
+        return self
+
+    def _load(self, cached: Dict):
+        """从缓存数据填充字段"""
+        self._reset_meta()
+        for field in self.META_FIELDS:
+            if field in cached:
+                setattr(self, '_' + field, cached[field])
+        self._parsed = True
+
+        if all(field in cached for field in self.LAYOUT_FIELDS):
+            for field in self.LAYOUT_FIELDS:
+                setattr(self, '_' + field, cached[field])
+            self._layout_resolved = True
+
+    def _resolve_meta(self):
+        """首次访问元数据时解析，优先使用缓存（启用分析时记录每个技能的耗时）"""
+        if skill_profile.active is None:
+            self._load_meta()
+            return
+        started = time.perf_counter()
+        self._load_meta()
+        skill_profile.record_skill(self.path, time.perf_counter() - started)
+
+    def _load_meta(self):
+        if self._cache is None:
+            self._parse()
+            return
+
+        key = SkillCache.make_key(self.path)
+        cached = self._cache.get(self.path, key)
+        if cached is not None:
+            self._load(cached)
+            return
 
         self._parse()
+        self._cache.put(self.path, key, self.to_cache())
+
+    @profiled('layout')
+    def _resolve_layout(self):
+        """列出技能目录一次，得到附加目录标志（结果补充到缓存条目中）"""
+        skill_profile.count('dirs_listed')
+        self._has_scripts = self._has_references = self._has_assets = False
+        self._layout_resolved = True
+
+        try:
+            with os.scandir(self.path) as entries:
+                subdirs = {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            subdirs = set()
+
+        self._has_scripts = 'scripts' in subdirs
+        self._has_references = 'references' in subdirs
+        self._has_assets = 'assets' in subdirs
+
+        if self._cache is not None:
+            self._cache.update(self.path, {field: getattr(self, '_' + field) for field in self.LAYOUT_FIELDS})
+
+    def _reset_meta(self):
+        self._name = self.path.name
+        self._description = ""
+        self._version = None
+        self._author = None
+        self._license = None
+        self._compatibility = None
+        self._metadata = {}
+        self._allowed_tools = ()
+        self._is_valid = False
+        self._errors = ()
+        self._warnings = ()
+
+    def _add_error(self, message: str):
+        self._errors = self._errors + (message,)
+
+    def _add_warning(self, message: str):
+        self._warnings = self._warnings + (message,)
 
     def _parse(self):
         """解析技能元数据"""
+        self._reset_meta()
+        self._parsed = True
         skill_md = self.path / 'SKILL.md'
 
-        if not skill_md.exists():
-            self.errors.append("缺少 SKILL.md 文件")
-            return
-
         try:
-            content = skill_md.read_text(encoding='utf-8')
-
-            # 检查 YAML frontmatter
-            if not content.startswith('---'):
-                self.errors.append("SKILL.md 必须以 YAML frontmatter 开头")
-                return
-
-            # 提取 frontmatter
-            parts = content.split('---', 2)
-            if len(parts) < 3:
-                self.errors.append("YAML frontmatter 格式错误")
+            # 提取 YAML frontmatter（不读取正文）
+            try:
+                with skill_profile.phase('read_frontmatter'):
+                    skill_profile.count('reads')
+                    header = read_frontmatter(skill_md)
+            except FileNotFoundError:
+                self._add_error("缺少 SKILL.md 文件")
                 return
+            skill_profile.count('bytes_read', len(header))
 
-            frontmatter = yaml.safe_load(parts[1])
+            with skill_profile.phase('parse_yaml'):
+                frontmatter = parse_frontmatter(header)
 
             # 提取必需字段
             if 'name' not in frontmatter:
-                self.errors.append("缺少必需字段: name")
+                self._add_error("缺少必需字段: name")
                 return
-            self.name = frontmatter['name']
+            self._name = frontmatter['name']
 
             if 'description' not in frontmatter:
-                self.errors.append("缺少必需字段: description")
+                self._add_error("缺少必需字段: description")
                 return
-            self.description = frontmatter['description']
+            self._description = frontmatter['description']
 
             # 验证目录名与技能名称一致
-            if self.path.name != self.name:
-                self.warnings.append(
-                    f"目录名 ({self.path.name}) 与技能名称 ({self.name}) 不一致"
+            if self.path.name != self._name:
+                self._add_warning(
+                    f"目录名 ({self.path.name}) 与技能名称 ({self._name}) 不一致"
                 )
 
             # 提取可选字段
-            self.license = frontmatter.get('license')
-            self.compatibility = frontmatter.get('compatibility')
-            self.metadata = frontmatter.get('metadata', {})
+            self._license = frontmatter.get('license')
+            self._compatibility = frontmatter.get('compatibility')
+            self._metadata = frontmatter.get('metadata', {})
 
-            if isinstance(self.metadata, dict):
-                self.version = self.metadata.get('version')
-                self.author = self.metadata.get('author')
+            if isinstance(self._metadata, dict):
+                self._version = self._metadata.get('version')
+                self._author = self._metadata.get('author')
 
             allowed_tools = frontmatter.get('allowed-tools', '')
             if allowed_tools:
-                self.allowed_tools = allowed_tools.split()
-
-            # 检查附加目录
-            self.has_scripts = (self.path / 'scripts').exists()
-            self.has_references = (self.path / 'references').exists()
-            self.has_assets = (self.path / 'assets').exists()
+                self._allowed_tools = allowed_tools.split()
 
-            self.is_valid = True
+            self._is_valid = True
 
-        except yaml.YAMLError as e:
-            self.errors.append(f"YAML 解析错误: {str(e)}")
+        except FrontmatterError as e:
+            self._add_error(str(e))
         except Exception as e:
-            self.errors.append(f"解析失败: {str(e)}")
+            self._add_error(f"解析失败: {str(e)}")
+
+    def to_cache(self) -> Dict:
+        """导出可缓存的字段（目录结构字段只在已检查过时导出，不会为此列出目录）"""
+        fields = self.CACHED_FIELDS if self._layout_resolved else self.META_FIELDS
+        return {field: getattr(self, field) for field in fields}
 
     def to_dict(self) -> Dict:
         """转换为字典"""
@@ -153,21 +625,218 @@ class SkillInfo:
             'license': self.license,
             'compatibility': self.compatibility,
             'metadata': self.metadata,
-            'allowed_tools': self.allowed_tools,
+            'allowed_tools': list(self.allowed_tools),
             'has_scripts': self.has_scripts,
             'has_references': self.has_references,
             'has_assets': self.has_assets,
             'is_valid': self.is_valid,
-            'errors': self.errors,
-            'warnings': self.warnings
+            'errors': list(self.errors),
+            'warnings': list(self.warnings)
         }
 
 
+# 技能清单：每个根目录一个，记录该目录下所有技能的已解析字段、状态戳和内容哈希
+MANIFEST_NAME = '.skills-manifest.json'
+MANIFEST_VERSION = 2
+
+
+def content_hash(path: Path) -> Optional[str]:
+    """文件内容的 SHA-256，文件不存在时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            return 'sha256:' + hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def manifest_entry(skill: SkillInfo) -> Dict:
+    """技能清单中的一项：全部可缓存字段（含目录结构），以及与 SkillCache 相同的状态戳"""
+    entry = skill.resolve().to_cache()
+    entry.update({
+        'path': str(skill.path),
+        'level': skill.level,
+        'key': SkillCache.make_key(skill.path),
+        'hash': content_hash(skill.path / 'SKILL.md'),
+    })
+    return entry
+
+
+def load_manifest(root: Path) -> Optional[Dict]:
+    """读取根目录的技能清单
+
+    清单写入后会把自身的 mtime 设为根目录的 mtime；根目录之后有技能增删（mtime 更新）
+    即视为过期。文件缺失、损坏、版本不符或已过期时返回 None。
+    """
+    manifest_path = root / MANIFEST_NAME
+    try:
+        if os.stat(root).st_mtime_ns > os.stat(manifest_path).st_mtime_ns:
+            return None
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def write_manifest(root: Path, level: str, entries: List[Dict]):
+    """原子写入根目录的技能清单"""
+    manifest_path = root / MANIFEST_NAME
+    tmp_path = root / (MANIFEST_NAME + '.tmp')
+    data = {
+        'version': MANIFEST_VERSION,
+        'root': str(root),
+        'level': level,
+        'generated': datetime.now().isoformat(),
+        'skills': entries,
+    }
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1, default=str)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    # 与根目录 mtime 对齐，用于判断清单是否过期
+    st = os.stat(root)
+    os.utime(manifest_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def update_manifest(skill_path: Path) -> bool:
+    """新增或替换技能后增量更新所在根目录的清单
+
+    根目录还没有清单时不创建（由 --build-manifest 生成）。如果根目录中还有清单未记录的
+    其他变化，则重新扫描整个根目录。返回清单是否已更新。
+    """
+    skill_path = Path(os.path.abspath(skill_path))
+    root = skill_path.parent
+    try:
+        with open(root / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not isinstance(data, dict) or data.get('version') != MANIFEST_VERSION:
+        return False
+
+    level = data.get('level', 'custom')
+    lister = SkillLister()
+    try:
+        present = lister._list_skill_dirs(root)
+        entries = [e for e in data.get('skills', []) if e.get('path') != str(skill_path)]
+        if skill_path in present:
+            entries.append(manifest_entry(lister.load_skill(skill_path, level)))
+
+        if {e.get('path') for e in entries} != {str(p) for p in present}:
+            entries = [manifest_entry(s) for s in lister.scan_skills([(root, level)])]
+        write_manifest(root, level, entries)
+    except OSError:
+        return False
+    return True
+
+
+# 项目根目录标识文件
+PROJECT_MARKERS = [
+    '.git', 'package.json', 'pyproject.toml',
+    'Cargo.toml', 'pom.xml', 'go.mod', 'setup.py'
+]
+
+_UNSET = object()
+
+
+def find_project_root(start_path: Optional[Path] = None) -> Optional[Path]:
+    """从 start_path（默认当前目录）向上查找项目根目录"""
+    if start_path is None:
+        start_path = Path.cwd()
+
+    current = start_path.resolve()
+    while current != current.parent:
+        if any((current / marker).exists() for marker in PROJECT_MARKERS):
+            return current
+        current = current.parent
+
+    return None
+
+
+class SkillRootResolver:
+    """项目根目录和技能根目录解析器
+
+    项目根目录只向上查找一次，候选技能根目录的存在性检查结果（存在与不存在）都会被缓存。
+    SkillLister 和 SkillInstaller 可以共用同一个实例；长期运行的调用方在目录变化后
+    调用 invalidate() 清除缓存。
+    """
+
+    def __init__(self, start_path: Optional[Path] = None):
+        self.start_path = start_path
+        self._project_root = _UNSET
+        self._exists = {}
+
+    def project_root(self) -> Optional[Path]:
+        """项目根目录（结果会被缓存）"""
+        if self._project_root is _UNSET:
+            self._project_root = find_project_root(self.start_path)
+        return self._project_root
+
+    def exists(self, path: Path) -> bool:
+        """检查候选技能根目录是否存在（结果会被缓存）"""
+        key = str(path)
+        result = self._exists.get(key)
+        if result is None:
+            skill_profile.count('stats')
+            result = self._exists[key] = path.exists()
+        return result
+
+    def invalidate(self, path: Optional[Path] = None):
+        """清除缓存：指定路径则只清除该路径的存在性结果，否则全部清除（包括项目根目录）"""
+        if path is None:
+            self._project_root = _UNSET
+            self._exists.clear()
+        else:
+            self._exists.pop(str(path), None)
+
+
+def level_matches(skill_level: str, level: str) -> bool:
+    """级别匹配：'user' 同时匹配 'user-AgentSkills' 等带规范后缀的级别"""
+    return skill_level == level or skill_level.startswith(level + '-')
+
+
+# 分组显示的级别顺序和名称
+LEVEL_ORDER = ['project', 'workspace', 'user', 'system', 'custom']
+LEVEL_NAMES = {
+    'user': '用户级',
+    'project': '项目级',
+    'workspace': '工作区级',
+    'system': '系统级',
+    'custom': '自定义'
+}
+
+
+def level_rank(level: str) -> int:
+    """级别的显示顺序（'user-AgentSkills' 按 'user' 排序）"""
+    base = level.split('-', 1)[0]
+    return LEVEL_ORDER.index(base) if base in LEVEL_ORDER else len(LEVEL_ORDER)
+
+
+def level_display_name(level: str) -> str:
+    """级别的显示名称，如 'user-AgentSkills' 显示为 '用户级 (AgentSkills)'"""
+    base, _, standard = level.partition('-')
+    name = LEVEL_NAMES.get(base, base)
+    return f"{name} ({standard})" if standard else name
+
+
 class SkillLister:
     """技能列表器"""
 
-    def __init__(self, standard: SkillStandard = SkillStandard.ALL):
+    def __init__(
+        self,
+        standard: SkillStandard = SkillStandard.ALL,
+        cache: Optional[SkillCache] = None,
+        resolver: Optional[SkillRootResolver] = None
+    ):
         self.standard = standard
+        self.cache = cache
+        self.resolver = resolver or SkillRootResolver()
         self.skills = []
         self.level_colors = {
             'user': '\033[94m',      # 蓝色
@@ -188,29 +857,17 @@ class SkillLister:
         return Path.home() / user_dir
 
     def find_project_root(self, start_path: Optional[Path] = None) -> Optional[Path]:
-        """查找项目根目录"""
+        """查找项目根目录（未指定起点时使用解析器缓存的结果）"""
         if start_path is None:
-            start_path = Path.cwd()
-
-        current = start_path.resolve()
-        project_markers = [
-            '.git', 'package.json', 'pyproject.toml',
-            'Cargo.toml', 'pom.xml', 'go.mod', 'setup.py'
-        ]
-
-        while current != current.parent:
-            if any((current / marker).exists() for marker in project_markers):
-                return current
-            current = current.parent
-
-        return None
+            return self.resolver.project_root()
+        return find_project_root(start_path)
 
     def get_project_skills_dir(self) -> Optional[Path]:
         """获取项目级技能目录"""
         project_root = self.find_project_root()
         if project_root:
             skills_dir = project_root / '.agent-skills'
-            if skills_dir.exists():
+            if self.resolver.exists(skills_dir):
                 return skills_dir
         return None
 
@@ -224,6 +881,7 @@ class SkillLister:
         else:  # macOS/Linux
             return Path('/usr/local/share/agent-skills')
 
+    @profiled('discover_roots')
     def get_all_skills_dirs(self) -> List[Tuple[Path, str]]:
         """获取所有技能目录（路径, 级别）"""
         dirs = []
@@ -234,20 +892,21 @@ class SkillLister:
         else:
             standards = [self.standard]
 
+        project_root = self.find_project_root()
+
         # 扫描每个规范的路径
         for std in standards:
             config = STANDARD_CONFIG[std]
 
             # 用户级
             user_dir = self.get_user_skills_dir(std)
-            if user_dir and user_dir.exists():
+            if user_dir and self.resolver.exists(user_dir):
                 dirs.append((user_dir, f'user-{config["name"]}'))
 
             # 项目级
-            project_root = self.find_project_root()
             if project_root:
                 project_dir = project_root / config["project_dir"]
-                if project_dir.exists():
+                if self.resolver.exists(project_dir):
                     dirs.append((project_dir, f'project-{config["name"]}'))
 
             # 系统级
@@ -258,57 +917,320 @@ class SkillLister:
 
             if sys_path:
                 sys_dir = Path(sys_path)
-                if sys_dir.exists():
+                if self.resolver.exists(sys_dir):
                     dirs.append((sys_dir, f'system-{config["name"]}'))
 
         return dirs
 
-    def scan_skills(self, paths: Optional[List[Tuple[Path, str]]] = None) -> List[SkillInfo]:
-        """扫描技能"""
+    def scan_skills(
+        self,
+        paths: Optional[List[Tuple[Path, str]]] = None,
+        workers: int = 1
+    ) -> List[SkillInfo]:
+        """扫描技能
+
+        workers > 1 时使用线程池并发列目录和解析技能，
+        结果顺序以及错误/警告输出与串行扫描一致。
+        """
+        return list(self.iter_skills(paths, workers))
+
+    def iter_skills(
+        self,
+        paths: Optional[List[Tuple[Path, str]]] = None,
+        workers: int = 1
+    ) -> Iterator[SkillInfo]:
+        """逐个产出技能（scan_skills 的生成器版本），调用方停止迭代时扫描随之停止"""
         if paths is None:
             paths = self.get_all_skills_dirs()
 
-        skills = []
+        if workers > 1:
+            yield from self._iter_concurrent(paths, workers)
+            return
 
         for skill_dir, level in paths:
-            if not skill_dir.exists():
+            try:
+                items = self._list_skill_dirs(skill_dir)
+            except PermissionError:
+                self._report_unreadable(skill_dir)
                 continue
+            for item in items:
+                yield self.load_skill(item, level)
+
+    def _iter_concurrent(self, paths: List[Tuple[Path, str]], workers: int) -> Iterator[SkillInfo]:
+        """并发扫描：先并发列出所有根目录，再并发解析技能"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            listings = [executor.submit(self._list_skill_dirs, skill_dir) for skill_dir, _ in paths]
+
+            # 按根目录顺序收集结果，保证警告输出顺序与串行扫描一致
+            jobs = []
+            for (skill_dir, level), listing in zip(paths, listings):
+                try:
+                    items = listing.result()
+                except PermissionError:
+                    self._report_unreadable(skill_dir)
+                    continue
+                jobs.extend((item, level) for item in items)
+
+            # 并发模式下在线程池中立即完成解析；提交窗口有上限，按顺序产出
+            window = deque()
+            for item, level in jobs:
+                window.append(executor.submit(self._load_resolved, item, level))
+                if len(window) >= workers * 4:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+
+    def _load_resolved(self, path: Path, level: str) -> SkillInfo:
+        return self.load_skill(path, level).resolve()
+
+    @profiled('list_dirs')
+    def _list_skill_dirs(self, skill_dir: Path) -> List[Path]:
+        """列出根目录下的技能子目录（根目录不存在时返回空列表）
+
+        使用 os.scandir，目录类型来自目录项本身，无需逐项 stat。
+        """
+        skill_profile.count('dirs_listed')
+        # 列出所有子目录
+        try:
+            with os.scandir(skill_dir) as entries:
+                items = [
+                    Path(entry.path) for entry in entries
+                    if not entry.name.startswith('.') and entry.is_dir()
+                ]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+        if self.cache is not None:
+            self.cache.retain(skill_dir, items)
+
+        return items
 
-            # 列出所有子目录
+    def _report_unreadable(self, skill_dir: Path):
+        print(f"⚠️  警告: 无法读取 {skill_dir} (权限被拒绝)", file=sys.stderr)
+
+    def iter_manifest_skills(self, paths: Optional[List[Tuple[Path, str]]] = None) -> Iterator[SkillInfo]:
+        """从技能清单读取技能（每个根目录一次文件读取），清单缺失或过期的根目录回退到扫描
+
+        清单包含全部元数据和目录结构字段，输出时无需再访问技能目录。每个技能的状态戳
+        （SKILL.md 的 mtime/size/inode 和技能目录 mtime）与清单不一致时（如就地编辑了 SKILL.md），
+        只重新加载该技能。
+        """
+        if paths is None:
+            paths = self.get_all_skills_dirs()
+
+        for skill_dir, level in paths:
+            manifest = load_manifest(skill_dir)
+            if manifest is None:
+                yield from self.iter_skills([(skill_dir, level)])
+                continue
+            for entry in manifest.get('skills', []):
+                path = Path(entry['path'])
+                skill_level = entry.get('level', level)
+                key = SkillCache.make_key(path)
+                if key != entry.get('key'):
+                    skill_profile.count('manifest_stale')
+                    yield self.load_skill(path, skill_level)
+                else:
+                    yield SkillInfo(path, skill_level, cached=entry)
+
+    def build_manifests(
+        self,
+        paths: Optional[List[Tuple[Path, str]]] = None,
+        workers: int = 1
+    ) -> Tuple[List[Tuple[Path, int]], int]:
+        """为每个根目录生成技能清单，返回 ((清单路径, 技能数量) 列表, 跳过的根目录数)
+
+        无法写入的根目录（如没有权限的系统级目录）给出警告后跳过，不影响其他根目录。
+        """
+        if paths is None:
+            paths = self.get_all_skills_dirs()
+
+        written = []
+        skipped = 0
+        for skill_dir, level in paths:
+            skill_dir = Path(os.path.abspath(skill_dir))
+            skills = self.scan_skills([(skill_dir, level)], workers)
             try:
-                for item in skill_dir.iterdir():
-                    if item.is_dir() and not item.name.startswith('.'):
-                        skill_info = SkillInfo(item, level)
-                        skills.append(skill_info)
-            except PermissionError:
-                print(f"⚠️  警告: 无法读取 {skill_dir} (权限被拒绝)", file=sys.stderr)
+                write_manifest(skill_dir, level, [manifest_entry(s) for s in skills])
+            except OSError as e:
+                print(f"⚠️  警告: 无法写入清单 {skill_dir / MANIFEST_NAME}: {e}", file=sys.stderr)
+                skipped += 1
+                continue
+            written.append((skill_dir / MANIFEST_NAME, len(skills)))
+        return written, skipped
 
-        return skills
+    def load_skill(self, path: Path, level: str) -> SkillInfo:
+        """创建（延迟解析的）技能信息，元数据在首次访问时从缓存或 SKILL.md 读取"""
+        return SkillInfo(path, level, cache=self.cache)
 
+    @profiled('filter')
     def filter_skills(
         self,
         skills: List[SkillInfo],
         search: Optional[str] = None,
-        level: Optional[str] = None
+        level: Optional[str] = None,
+        limit: Optional[int] = None,
+        author: Optional[str] = None,
+        version: Optional[str] = None,
+        license: Optional[str] = None,
+        tool: Optional[str] = None
     ) -> List[SkillInfo]:
-        """过滤技能"""
-        result = skills
+        """过滤技能
+
+        有搜索关键词时按 BM25 相关度降序返回，limit 限制返回前 k 个结果。
+        """
+        candidates = None
 
         # 按级别过滤
         if level:
-            result = [s for s in result if s.level == level]
+            candidates = [i for i, s in enumerate(skills) if level_matches(s.level, level)]
+
+        # 按作者、版本、许可证和允许的工具过滤
+        checks = []
+        if author is not None:
+            checks.append(lambda s: s.author is not None and str(s.author) == author)
+        if version is not None:
+            checks.append(lambda s: s.version is not None and str(s.version) == version)
+        if license is not None:
+            checks.append(lambda s: s.license is not None and str(s.license) == license)
+        if tool:
+            checks.append(lambda s: tool in s.allowed_tools)
+        if checks:
+            candidates = [
+                i for i in (range(len(skills)) if candidates is None else candidates)
+                if all(check(skills[i]) for check in checks)
+            ]
 
         # 按关键词搜索
         if search:
-            search_lower = search.lower()
-            result = [
-                s for s in result
-                if search_lower in s.name.lower() or
-                search_lower in s.description.lower() or
-                (s.author and search_lower in s.author.lower())
-            ]
+            index = self.get_search_index(skills)
+            hits = index.search(
+                search,
+                limit=limit,
+                candidates=set(candidates) if candidates is not None else None
+            )
+            return [skills[doc_id] for doc_id, _ in hits]
+
+        if candidates is None:
+            return list(skills)
+        return [skills[i] for i in candidates]
+
+    def suggest_names(self, skills: List[SkillInfo], name: str, limit: int = 3) -> List[str]:
+        """根据三元组相似度给出最接近的技能名称（用于“你是不是要找”提示）"""
+        index = TrigramIndex(s.name for s in skills if s.name)
+        return [match for match, _ in index.similar(name, limit=limit, threshold=0.3)]
+
+    @profiled('search_index')
+    def get_search_index(self, skills: List[SkillInfo]) -> SearchIndex:
+        """获取搜索索引
+
+        启用缓存时索引保存在扫描缓存旁边的 search-index.json 中（只保留一份，签名记录在文件内），
+        技能集合及其 SKILL.md 状态未变化时直接加载，否则重建并覆盖。
+        """
+        if self.cache is None:
+            return SearchIndex.build(skills)
+
+        index_path = self.cache.cache_path.with_name('search-index.json')
+        signature = index_signature((str(s.path), SkillCache.make_key(s.path)) for s in skills)
+
+        index = SearchIndex.load(index_path, signature)
+        if index is None:
+            index = SearchIndex.build(skills, signature)
+            try:
+                index.save(index_path)
+            except OSError as e:
+                print(f"⚠️  警告: 无法写入搜索索引 {index_path}: {e}", file=sys.stderr)
+        return index
+
+    def measure_budget(self, skill: SkillInfo) -> Dict[str, int]:
+        """技能的上下文成本，结果附加在扫描缓存条目上
+
+        缓存键由 SKILL.md 的缓存键和 references/ 下文件的状态签名组成，
+        SKILL.md 或参考文件未变化时无需重新读取。
+        """
+        references = list_references(skill.path)
+        key = None
+        if self.cache is not None:
+            skill_key = SkillCache.make_key(skill.path)
+            if skill_key is not None:
+                key = [skill_key, reference_signature(references)]
+                cached = self.cache.get_extra(skill.path, 'budget', key)
+                if cached is not None:
+                    return cached
+
+        budget = measure_skill(skill.path, skill.name, skill.description, references)
+        if key is not None:
+            self.cache.put_extra(skill.path, 'budget', key, budget)
+        return budget
+
+    @profiled('budget')
+    def measure_budgets(self, skills: List[SkillInfo], workers: int = 1) -> List[Dict[str, int]]:
+        """统计所有技能的上下文成本（workers > 1 时并发）"""
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(self.measure_budget, skills))
+        return [self.measure_budget(s) for s in skills]
+
+    def budget_data(self, skills: List[SkillInfo], budgets: List[Dict[str, int]], top: int = 5) -> Dict:
+        """上下文成本报告的数据结构（JSON 输出）"""
+        by_level = {}
+        for skill, budget in zip(skills, budgets):
+            by_level.setdefault(skill.level, []).append(budget)
+
+        rows = [
+            dict({'name': s.name, 'path': str(s.path), 'level': s.level}, **budget)
+            for s, budget in zip(skills, budgets)
+        ]
+        expensive = sorted(rows, key=lambda row: (-row['description_tokens'], row['name']))[:top]
+        return {
+            'total_count': len(skills),
+            'timestamp': datetime.now().isoformat(),
+            'skills': rows,
+            'levels': {level: sum_budgets(items) for level, items in sorted(by_level.items())},
+            'total': sum_budgets(budgets),
+            'most_expensive_descriptions': [
+                {'name': row['name'], 'level': row['level'], 'description_tokens': row['description_tokens']}
+                for row in expensive
+            ],
+        }
 
-        return result
+    def format_budget(self, skills: List[SkillInfo], budgets: List[Dict[str, int]], top: int = 5) -> str:
+        """格式化上下文成本报告"""
+        if not skills:
+            return "❌ 未找到技能"
+
+        data = self.budget_data(skills, budgets, top)
+        max_name = max(len(row['name']) for row in data['skills'])
+
+        lines = []
+        lines.append(f"\n📊 上下文成本估算 (共 {len(skills)} 个技能，token 数为近似值)\n")
+        lines.append(
+            f"{'名称':<{max_name}}  {'级别':<20} {'常驻 tokens':>12} {'正文 字节':>10} {'正文 tokens':>12}"
+            f" {'参考文件':>8} {'参考 字节':>10} {'参考 tokens':>12}"
+        )
+        for row in sorted(data['skills'], key=lambda row: (row['level'], row['name'])):
+            lines.append(
+                f"{row['name']:<{max_name}}  {row['level']:<20} {row['description_tokens']:>12}"
+                f" {row['body_bytes']:>10} {row['body_tokens']:>12} {row['reference_count']:>8}"
+                f" {row['reference_bytes']:>10} {row['reference_tokens']:>12}"
+            )
+
+        lines.append(f"\n按级别汇总:")
+        for level, total in list(data['levels'].items()) + [('合计', data['total'])]:
+            lines.append(
+                f"  {level:<20} {total['skill_count']:>5} 个技能  常驻 {total['description_tokens']} tokens"
+                f"  正文 {total['body_tokens']} tokens  参考 {total['reference_tokens']} tokens"
+            )
+
+        lines.append(f"\n⚠️  常驻成本最高的描述 (每次会话都会加载):")
+        for i, row in enumerate(data['most_expensive_descriptions'], 1):
+            lines.append(f"  {i}. {row['name']} ({row['level']}): {row['description_tokens']} tokens")
+
+        return '\n'.join(lines)
 
     def colorize(self, text: str, level: str) -> str:
         """添加颜色"""
@@ -317,106 +1239,137 @@ class SkillLister:
         color = self.level_colors.get(level, '')
         return f"{color}{text}{self.reset_color}"
 
-    def format_list(self, skills: List[SkillInfo], group_by_level: bool = True) -> str:
-        """格式化为列表"""
-        if not skills:
-            return "❌ 未找到技能"
-
-        lines = []
-        lines.append(f"\n📚 已安装的技能 (共 {len(skills)} 个)\n")
-
-        if group_by_level:
-            # 按级别分组
-            grouped = {}
-            for skill in skills:
-                if skill.level not in grouped:
-                    grouped[skill.level] = []
-                grouped[skill.level].append(skill)
-
-            level_names = {
-                'user': '用户级',
-                'project': '项目级',
-                'workspace': '工作区级',
-                'system': '系统级',
-                'custom': '自定义'
-            }
-
-            level_order = ['project', 'workspace', 'user', 'system', 'custom']
-
-            for level in level_order:
-                if level not in grouped:
-                    continue
-
-                level_skills = sorted(grouped[level], key=lambda s: s.name)
-                level_name = level_names.get(level, level)
-
-                # 获取第一个技能的路径作为级别路径
-                if level_skills:
-                    level_path = level_skills[0].path.parent
-
-                lines.append(f"\n【{level_name}】 ({level_path})")
+    def sort_key(self, sort: Optional[str], group_by_level: bool = False) -> Callable[[SkillInfo], tuple]:
+        """排序键：name 按名称，level 按级别再按名称，path 按路径（无需解析 frontmatter），
+        None 不排序（配合稳定排序保持原有顺序）
+
+        分组显示时在前面加上级别，保证同一级别的技能连续。
+        """
+        if sort is None:
+            key = lambda s: ()
+        elif sort == 'path':
+            key = lambda s: (str(s.path),)
+        elif sort == 'level':
+            key = lambda s: (level_rank(s.level), s.level, s.name)
+        else:
+            key = lambda s: (s.name, str(s.path))
+        if not group_by_level:
+            return key
+        return lambda s: (level_rank(s.level), s.level) + key(s)
 
-                for i, skill in enumerate(level_skills, 1):
-                    lines.append(f"  {i}. {self.colorize(skill.name, skill.level)}")
+    def paginate(
+        self,
+        skills: List[SkillInfo],
+        sort: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        group_by_level: bool = False
+    ) -> List[SkillInfo]:
+        """排序并分页，返回第 [offset, offset + limit) 个技能
+
+        指定 limit 时用堆做部分选择（只保留前 offset + limit 个），不对全部技能排序；
+        sort 为 None 时保持传入顺序（如搜索相关度顺序），只做切片。
+        """
+        end = None if limit is None else offset + limit
+        if sort is None and not group_by_level:
+            return list(skills[offset:end])
+        key = self.sort_key(sort, group_by_level)
+        if end is None:
+            return sorted(skills, key=key)[offset:]
+        return heapq.nsmallest(end, skills, key=key)[offset:]
+
+    def iter_list_lines(
+        self,
+        skills: List[SkillInfo],
+        group_by_level: bool = True,
+        total: Optional[int] = None,
+        start: int = 1
+    ) -> Iterator[str]:
+        """逐行生成列表输出（按传入顺序，分组时连续的同级别技能为一组）
+
+        total 为分页前的技能总数，start 为第一个技能的序号。
+        """
+        if not skills:
+            yield "❌ 未找到技能"
+            return
 
-                    if skill.is_valid:
-                        desc = skill.description
-                        if len(desc) > 60:
-                            desc = desc[:57] + "..."
-                        lines.append(f"     描述: {desc}")
+        total = len(skills) if total is None else total
+        if len(skills) < total:
+            yield f"\n📚 已安装的技能 (共 {total} 个，显示第 {start}-{start + len(skills) - 1} 个)\n"
+        else:
+            yield f"\n📚 已安装的技能 (共 {total} 个)\n"
+
+        current_level = None
+        for i, skill in enumerate(skills, start):
+            if not group_by_level:
+                yield f"\n{i}. {self.colorize(skill.name, skill.level)}"
+                yield f"   描述: {skill.description}"
+                yield f"   级别: {skill.level}"
+                yield f"   路径: {skill.path}"
+                continue
 
-                        if skill.version:
-                            lines.append(f"     版本: {skill.version}")
-                    else:
-                        lines.append(f"     ❌ 错误: {', '.join(skill.errors)}")
+            if skill.level != current_level:
+                current_level = skill.level
+                yield f"\n【{level_display_name(skill.level)}】 ({skill.path.parent})"
 
-                    if skill.warnings:
-                        for warning in skill.warnings:
-                            lines.append(f"     ⚠️  警告: {warning}")
+            yield f"  {i}. {self.colorize(skill.name, skill.level)}"
+            if skill.is_valid:
+                desc = skill.description
+                if len(desc) > 60:
+                    desc = desc[:57] + "..."
+                yield f"     描述: {desc}"
 
-        else:
-            # 不分组，按名称排序
-            sorted_skills = sorted(skills, key=lambda s: s.name)
-            for i, skill in enumerate(sorted_skills, 1):
-                lines.append(f"\n{i}. {self.colorize(skill.name, skill.level)}")
-                lines.append(f"   描述: {skill.description}")
-                lines.append(f"   级别: {skill.level}")
-                lines.append(f"   路径: {skill.path}")
+                if skill.version:
+                    yield f"     版本: {skill.version}"
+            else:
+                yield f"     ❌ 错误: {', '.join(skill.errors)}"
 
-        return '\n'.join(lines)
+            for warning in skill.warnings:
+                yield f"     ⚠️  警告: {warning}"
 
-    def format_table(self, skills: List[SkillInfo]) -> str:
-        """格式化为表格"""
+    def format_list(
+        self,
+        skills: List[SkillInfo],
+        group_by_level: bool = True,
+        sort: bool = True
+    ) -> str:
+        """格式化为列表（sort=False 时保持传入顺序，如搜索相关度顺序）"""
+        if sort:
+            skills = self.paginate(skills, 'name', group_by_level=group_by_level)
+        return '\n'.join(self.iter_list_lines(skills, group_by_level))
+
+    def iter_table_lines(self, skills: List[SkillInfo]) -> Iterator[str]:
+        """逐行生成表格输出（按传入顺序）"""
         if not skills:
-            return "❌ 未找到技能"
+            yield "❌ 未找到技能"
+            return
 
-        # 计算列宽
-        max_name = max(len(s.name) for s in skills) if skills else 10
+        # 计算列宽（只针对要显示的技能）
+        max_name = max(len(s.name) for s in skills)
         max_desc = 40
         max_version = 8
         max_level = 6
 
         # 表头
-        lines = []
-        header = f"| {'名称':<{max_name}} | {'描述':<{max_desc}} | {'版本':<{max_version}} | {'级别':<{max_level}} |"
-        separator = f"|{'-' * (max_name + 2)}|{'-' * (max_desc + 2)}|{'-' * (max_version + 2)}|{'-' * (max_level + 2)}|"
-
-        lines.append(header)
-        lines.append(separator)
+        yield f"| {'名称':<{max_name}} | {'描述':<{max_desc}} | {'版本':<{max_version}} | {'级别':<{max_level}} |"
+        yield f"|{'-' * (max_name + 2)}|{'-' * (max_desc + 2)}|{'-' * (max_version + 2)}|{'-' * (max_level + 2)}|"
 
         # 数据行
-        sorted_skills = sorted(skills, key=lambda s: (s.level, s.name))
-        for skill in sorted_skills:
+        for skill in skills:
             name = skill.name[:max_name]
             desc = skill.description[:max_desc - 3] + "..." if len(skill.description) > max_desc else skill.description
             version = skill.version or "N/A"
             level = skill.level
 
-            line = f"| {name:<{max_name}} | {desc:<{max_desc}} | {version:<{max_version}} | {level:<{max_level}} |"
-            lines.append(line)
+            yield f"| {name:<{max_name}} | {desc:<{max_desc}} | {version:<{max_version}} | {level:<{max_level}} |"
 
-        return '\n'.join(lines)
+    def format_table(self, skills: List[SkillInfo], sort: bool = True) -> str:
+        """格式化为表格（sort=False 时保持传入顺序）"""
+        if sort:
+            skills = self.paginate(skills, 'level')
+        return '\n'.join(self.iter_table_lines(skills))
 
+    @profiled('render')
     def format_detail(self, skill: SkillInfo) -> str:
         """格式化详细信息"""
         lines = []
@@ -439,11 +1392,9 @@ class SkillLister:
         lines.append(f"\n目录结构:")
         lines.append(f"  ├── SKILL.md")
         if skill.has_scripts:
-            script_count = len(list((skill.path / 'scripts').glob('*')))
-            lines.append(f"  ├── scripts/ ({script_count} 个文件)")
+            lines.append(f"  ├── scripts/ ({skill.script_count} 个文件)")
         if skill.has_references:
-            ref_count = len(list((skill.path / 'references').glob('*')))
-            lines.append(f"  ├── references/ ({ref_count} 个文件)")
+            lines.append(f"  ├── references/ ({skill.reference_count} 个文件)")
         if skill.has_assets:
             lines.append(f"  └── assets/")
 
@@ -480,43 +1431,304 @@ class SkillLister:
 
         return '\n'.join(lines)
 
-    def format_json(self, skills: List[SkillInfo]) -> str:
-        """格式化为 JSON"""
-        data = {
+    def json_data(self, skills: List[SkillInfo]) -> Dict:
+        """JSON 输出的数据结构（format_json 和注册表守护进程共用）"""
+        return {
             'total_count': len(skills),
             'timestamp': datetime.now().isoformat(),
             'skills': [s.to_dict() for s in skills]
         }
-        return json.dumps(data, indent=2, ensure_ascii=False)
 
-    def check_format(self, skills: List[SkillInfo]) -> str:
-        """检查格式"""
+    @profiled('render')
+    def format_json(self, skills: List[SkillInfo]) -> str:
+        """格式化为 JSON"""
+        return json.dumps(self.json_data(skills), indent=2, ensure_ascii=False)
+
+    def write_ndjson(self, skills: Iterable[SkillInfo], out: TextIO = sys.stdout) -> int:
+        """每个技能输出一行紧凑 JSON，逐条写出并刷新，返回输出的数量"""
+        count = 0
+        for skill in skills:
+            out.write(json.dumps(skill.to_dict(), ensure_ascii=False, separators=(',', ':'), default=str))
+            out.write('\n')
+            out.flush()
+            count += 1
+        return count
+
+    @profiled('validate')
+    def check_skills(self, skills: List[SkillInfo], workers: int = 1) -> List[Dict]:
+        """按 skill-lister 和 skill-installer 的规则检查技能（workers > 1 时使用进程池）"""
+        from skill_check import check_skills
+        return check_skills([(skill.path, skill.level) for skill in skills], workers)
+
+    @profiled('validate')
+    def check_changed(
+        self,
+        rev_range: str,
+        paths: Optional[List[Tuple[Path, str]]] = None,
+        workers: int = 1
+    ) -> List[Dict]:
+        """只检查 git 修订范围内改动过的技能，名称冲突对照全部技能检查
+
+        其余技能的名称从缓存读取（SKILL.md 未变化时无需解析）。
+        git 不可用或修订范围无效时抛出 RuntimeError。
+        """
+        import skill_check
+
+        if paths is None:
+            paths = self.get_all_skills_dirs()
+        cwd = paths[0][0] if len(paths) == 1 else None
+        files = skill_check.git_changed_files(rev_range, cwd)
+        targets = skill_check.owning_skills(files, paths)
+        if not targets:
+            return []
+
+        names = skill_check.name_index(
+            (skill.level, skill.name, str(skill.path))
+            for skill in self.iter_skills(paths)
+            if skill.is_valid
+        )
+        return skill_check.check_skills(targets, workers, names)
+
+    def format_check(self, results: List[Dict]) -> str:
+        """格式化检查结果"""
         lines = []
         lines.append(f"\n🔍 技能格式检查\n")
 
-        correct = 0
-        warnings = 0
-        errors = 0
-
-        for skill in sorted(skills, key=lambda s: s.name):
-            if skill.is_valid and not skill.warnings:
-                lines.append(f"✅ {skill.name}: 格式正确")
-                correct += 1
-            elif skill.is_valid and skill.warnings:
-                lines.append(f"⚠️  {skill.name}: 警告")
-                warnings += 1
-                for warning in skill.warnings:
-                    lines.append(f"   - {warning}")
+        for result in results:
+            if result['status'] == 'ok':
+                lines.append(f"✅ {result['name']}: 格式正确")
+                continue
+            if result['status'] == 'warning':
+                lines.append(f"⚠️  {result['name']}: 警告")
             else:
-                lines.append(f"❌ {skill.name}: 错误")
-                errors += 1
-                for error in skill.errors:
-                    lines.append(f"   - {error}")
+                lines.append(f"❌ {result['name']}: 错误")
+            for item in result['findings']:
+                lines.append(f"   - {item['message']}")
 
-        lines.append(f"\n总结: {len(skills)} 个技能，{correct} 个正确，{warnings} 个警告，{errors} 个错误")
+        from skill_check import summarize
+        summary = summarize(results)
+        lines.append(
+            f"\n总结: {summary['total']} 个技能，{summary['ok']} 个正确，"
+            f"{summary['warning']} 个警告，{summary['error']} 个错误"
+        )
 
         return '\n'.join(lines)
 
+    def check_format(self, skills: List[SkillInfo]) -> str:
+        """检查格式"""
+        return self.format_check(self.check_skills(skills))
+
+
+def _discard_stdout():
+    """下游已关闭管道：把 stdout 指向 /dev/null，避免解释器退出时再次刷新报错"""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+
+@profiled('render')
+def write_stream(lister: SkillLister, skills: Iterable[SkillInfo]) -> int:
+    """输出 NDJSON；下游提前关闭管道（如 head）时停止扫描并正常退出"""
+    try:
+        lister.write_ndjson(skills)
+    except BrokenPipeError:
+        _discard_stdout()
+    return 0
+
+
+@profiled('render')
+def write_lines(lines: Iterable[str]) -> int:
+    """逐行写出文本输出，不在内存中拼接整个输出；下游提前关闭管道时正常退出"""
+    try:
+        for line in lines:
+            sys.stdout.write(line)
+            sys.stdout.write('\n')
+        sys.stdout.flush()
+    except BrokenPipeError:
+        _discard_stdout()
+    return 0
+
+
+def write_profile(report: Dict, destination: str):
+    """写出分析报告，destination 为 '-' 时写到 stderr"""
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if destination == '-':
+        print(text, file=sys.stderr)
+    else:
+        Path(destination).write_text(text + '\n', encoding='utf-8')
+
+
+def write_check(lister: SkillLister, results: List[Dict], output_format: str) -> int:
+    """输出检查结果，有错误时返回 1"""
+    import skill_check
+
+    if output_format == 'sarif':
+        print(json.dumps(skill_check.to_sarif(results), indent=2, ensure_ascii=False))
+    elif output_format == 'json':
+        print(json.dumps(skill_check.to_json(results), indent=2, ensure_ascii=False))
+    elif output_format == 'ndjson':
+        write_lines(json.dumps(result, ensure_ascii=False, separators=(',', ':')) for result in results)
+    else:
+        print(lister.format_check(results))
+    return 1 if any(result['status'] == 'error' for result in results) else 0
+
+
+def fetch_from_registry(args: argparse.Namespace, roots: List[Tuple[Path, str]]) -> Optional[List[SkillInfo]]:
+    """通过注册表守护进程获取（已过滤的）技能列表
+
+    roots 是本进程解析出的技能根目录（项目级目录取决于当前工作目录）；守护进程不可用或
+    没有监视其中某个根目录（如在另一个项目中启动）时返回 None，调用方回退到本地扫描。
+    """
+    if args.search:
+        request = {'op': 'search', 'query': args.search, 'level': args.level, 'limit': args.top_k}
+    else:
+        # 查看详情时取回全部技能，以便在本地给出相似名称提示
+        request = {'op': 'list', 'level': args.level}
+    request['roots'] = [[os.path.abspath(root), level] for root, level in roots]
+
+    response = query_registry(request)
+    if response is None:
+        return None
+    return [SkillInfo.from_dict(data) for data in response.get('skills', [])]
+
+
+def run(lister: SkillLister, args: argparse.Namespace) -> int:
+    """执行扫描、过滤和输出"""
+    # 扫描技能
+    paths = None
+    if args.path:
+        custom_path = Path(args.path)
+        if not custom_path.exists():
+            print(f"❌ 路径不存在: {custom_path}", file=sys.stderr)
+            return 1
+        paths = [(custom_path, 'custom')]
+
+    # 生成技能清单
+    if args.build_manifest:
+        written, skipped = lister.build_manifests(paths, workers=args.jobs)
+        for manifest_path, count in written:
+            print(f"✅ 已写入清单: {manifest_path} ({count} 个技能)")
+        if skipped:
+            print(f"⚠️  {skipped} 个根目录无法写入，已跳过", file=sys.stderr)
+        return 0
+
+    # 优先使用注册表守护进程（结果已按级别和关键词过滤）
+    skills = None
+    # 守护进程只支持按级别和关键词过滤
+    attribute_filters = args.author or args.skill_version or args.license or args.tool
+    if paths is None and not (args.no_daemon or args.check or args.budget or args.rebuild_cache
+                              or args.catalog or attribute_filters):
+        skills = fetch_from_registry(args, lister.get_all_skills_dirs())
+
+    if skills is None:
+        # 只有本地扫描才需要加载缓存
+        if lister.cache is not None and not args.rebuild_cache:
+            lister.cache.load()
+
+        # 增量检查：只检查修订范围内改动过的技能
+        if args.changed:
+            if args.level:
+                paths = [(d, level) for d, level in (paths or lister.get_all_skills_dirs())
+                         if level_matches(level, args.level)]
+            try:
+                results = lister.check_changed(args.changed, paths, workers=args.jobs)
+            except RuntimeError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return 1
+            return write_check(lister, results, args.format)
+
+        if args.catalog:
+            # SQLite 技能目录：增量同步后由 SQL 完成过滤
+            from skill_catalog import SkillCatalog
+
+            if paths is None:
+                paths = lister.get_all_skills_dirs()
+            with SkillCatalog() as catalog:
+                catalog.sync(lister, paths)
+                skills = catalog.query(
+                    paths, args.search, args.level,
+                    author=args.author, version=args.skill_version,
+                    license=args.license, tool=args.tool, limit=args.top_k
+                )
+        else:
+            if args.manifest and not (args.check or args.budget):
+                stream = lister.iter_manifest_skills(paths)
+            elif args.check:
+                # 检查时由进程池解析技能，扫描阶段只列目录
+                stream = lister.iter_skills(paths)
+            else:
+                stream = lister.iter_skills(paths, workers=args.jobs)
+
+            # NDJSON 流式输出：边扫描边输出，不保留技能列表（不排序时分页直接截取流）
+            if args.format == 'ndjson' and not (args.search or args.detail or args.check or args.budget
+                                                or args.sort or attribute_filters):
+                if args.level:
+                    stream = (s for s in stream if level_matches(s.level, args.level))
+                end = None if args.limit is None else args.offset + args.limit
+                return write_stream(lister, itertools.islice(stream, args.offset, end))
+
+            skills = list(stream)
+
+            # 过滤技能
+            skills = lister.filter_skills(
+                skills, args.search, args.level, args.top_k,
+                author=args.author, version=args.skill_version,
+                license=args.license, tool=args.tool
+            )
+    # 搜索结果保持相关度顺序
+    ranked = bool(args.search)
+
+    # 显示详细信息
+    if args.detail:
+        # 先按目录名匹配（无需解析其他技能），再回退到按技能名称匹配
+        matching = [s for s in skills if s.dir_name == args.detail and s.name == args.detail]
+        if not matching:
+            matching = [s for s in skills if s.name == args.detail]
+        if not matching:
+            print(f"❌ 未找到技能: {args.detail}", file=sys.stderr)
+            suggestions = lister.suggest_names(skills, args.detail)
+            if suggestions:
+                print(f"💡 你是不是要找: {', '.join(suggestions)}", file=sys.stderr)
+            return 1
+        # 守护进程和清单只提供部分字段，详情始终从技能目录读取
+        skill = matching[0]
+        print(lister.format_detail(lister.load_skill(skill.path, skill.level)))
+        return 0
+
+    # 上下文成本报告
+    if args.budget:
+        budgets = lister.measure_budgets(skills, workers=args.jobs)
+        top = args.top_k or 5
+        if args.format in ('json', 'ndjson'):
+            print(json.dumps(lister.budget_data(skills, budgets, top), indent=2, ensure_ascii=False))
+        else:
+            print(lister.format_budget(skills, budgets, top))
+        return 0
+
+    # 检查格式（有错误时返回非零退出码）
+    if args.check:
+        return write_check(lister, lister.check_skills(skills, workers=args.jobs), args.format)
+
+    # 排序和分页：默认列表按名称、表格按级别排序，搜索结果保持相关度顺序
+    group = args.format == 'list' and not args.no_group
+    sort = args.sort
+    if sort is None and not ranked:
+        sort = {'list': 'name', 'table': 'level'}.get(args.format)
+    total = len(skills)
+    skills = lister.paginate(skills, sort, args.offset, args.limit, group_by_level=group)
+
+    # 显示列表（逐行写出）
+    if args.format == 'list':
+        return write_lines(lister.iter_list_lines(skills, group, total, start=args.offset + 1))
+    elif args.format == 'table':
+        return write_lines(lister.iter_table_lines(skills))
+    elif args.format == 'json':
+        print(lister.format_json(skills))
+    elif args.format == 'ndjson':
+        return write_stream(lister, skills)
+
+    return 0
+
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -537,11 +1749,49 @@ def main():
         '-s', '--search',
         help='搜索包含关键词的技能'
     )
+    parser.add_argument(
+        '--author',
+        help='仅显示指定作者的技能'
+    )
+    parser.add_argument(
+        '--skill-version',
+        metavar='VERSION',
+        help='仅显示指定版本的技能'
+    )
+    parser.add_argument(
+        '--license',
+        help='仅显示指定许可证的技能'
+    )
+    parser.add_argument(
+        '--tool',
+        help='仅显示允许使用指定工具 (allowed-tools) 的技能'
+    )
+    parser.add_argument(
+        '-k', '--top-k',
+        type=int,
+        help='搜索时只返回相关度最高的前 K 个结果'
+    )
     parser.add_argument(
         '-f', '--format',
-        choices=['list', 'table', 'json'],
+        choices=['list', 'table', 'json', 'ndjson', 'sarif'],
         default='list',
-        help='输出格式 (默认: list)'
+        help='输出格式 (默认: list；ndjson 每行一个技能，边扫描边输出；sarif 仅用于 --check)'
+    )
+    parser.add_argument(
+        '--sort',
+        choices=['name', 'level', 'path'],
+        help='排序方式 (默认: list 按名称，table 按级别；搜索结果按相关度)'
+    )
+    parser.add_argument(
+        '--limit',
+        type=int,
+        help='最多显示 N 个技能'
+    )
+    parser.add_argument(
+        '--offset',
+        type=int,
+        default=0,
+        help='跳过前 N 个技能（配合 --limit 分页）'
     )
     parser.add_argument(
         '-d', '--detail',
@@ -550,7 +1800,12 @@ def main():
     parser.add_argument(
         '-c', '--check',
         action='store_true',
-        help='检查技能格式问题'
+        help='检查技能格式问题（同时应用安装验证规则，有错误时退出码为 1）'
+    )
+    parser.add_argument(
+        '--changed',
+        metavar='REV_RANGE',
+        help='只检查 git 修订范围内改动过的技能（如 origin/main...HEAD，隐含 --check）'
     )
     parser.add_argument(
         '--no-color',
@@ -562,52 +1817,109 @@ def main():
         action='store_true',
         help='不按级别分组'
     )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='并发扫描的工作线程数；--check 时为并行检查的进程数 (默认: 1，即串行)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不使用元数据缓存'
+    )
+    parser.add_argument(
+        '--rebuild-cache',
+        action='store_true',
+        help='清空并重建元数据缓存'
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='输出缓存命中/未命中统计 (stderr)'
+    )
+    parser.add_argument(
+        '--budget',
+        action='store_true',
+        help='估算每个技能的上下文成本（字节数和近似 token 数）'
+    )
+    parser.add_argument(
+        '--manifest',
+        action='store_true',
+        help='从技能清单读取名称和描述，不逐个扫描技能目录'
+    )
+    parser.add_argument(
+        '--build-manifest',
+        action='store_true',
+        help='为每个技能根目录生成技能清单'
+    )
+    parser.add_argument(
+        '--catalog',
+        action='store_true',
+        help='使用 SQLite 技能目录（增量同步，用 SQL 查询完成过滤）'
+    )
+    parser.add_argument(
+        '--no-daemon',
+        action='store_true',
+        help='不使用注册表守护进程，直接扫描技能目录'
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='-',
+        metavar='FILE',
+        help='输出分阶段计时和操作计数的 JSON 报告（默认写到 stderr）'
+    )
+    parser.add_argument(
+        '--trace',
+        metavar='FILE',
+        help='同时用 cProfile 记录函数级耗时并写入 FILE（可用 pstats 查看）'
+    )
 
-    lister = SkillLister()
+    args = parser.parse_args()
+    if args.offset < 0 or (args.limit is not None and args.limit < 0):
+        parser.error("--limit 和 --offset 不能为负数")
+    if args.changed:
+        args.check = True
+    if args.format == 'sarif' and not args.check:
+        parser.error("-f sarif 只能与 --check 一起使用")
+
+    # 清单模式不读写缓存，避免只加载了部分技能的缓存覆盖缓存文件；技能目录模式由数据库代替缓存
+    cache = None
+    if not (args.no_cache or args.manifest or args.catalog):
+        cache = SkillCache()
+        if args.rebuild_cache:
+            cache.invalidate()
+
+    lister = SkillLister(cache=cache)
 
     if args.no_color:
         lister.use_color = False
 
-    # 扫描技能
-    if args.path:
-        custom_path = Path(args.path)
-        if not custom_path.exists():
-            print(f"❌ 路径不存在: {custom_path}", file=sys.stderr)
-            return 1
-        paths = [(custom_path, 'custom')]
-        skills = lister.scan_skills(paths)
-    else:
-        skills = lister.scan_skills()
-
-    # 过滤技能
-    skills = lister.filter_skills(skills, args.search, args.level)
-
-    # 显示详细信息
-    if args.detail:
-        matching = [s for s in skills if s.name == args.detail]
-        if not matching:
-            print(f"❌ 未找到技能: {args.detail}", file=sys.stderr)
-            return 1
-        print(lister.format_detail(matching[0]))
-        return 0
-
-    # 检查格式
-    if args.check:
-        print(lister.check_format(skills))
-        return 0
-
-    # 显示列表
-    if args.format == 'list':
-        print(lister.format_list(skills, not args.no_group))
-    elif args.format == 'table':
-        print(lister.format_table(skills))
-    elif args.format == 'json':
-        print(lister.format_json(skills))
-
-    return 0
+    profiler = skill_profile.enable() if args.profile else None
+    tracer = None
+    if args.trace:
+        import cProfile
+        tracer = cProfile.Profile()
+        tracer.enable()
 
+    # 技能元数据延迟解析，渲染结束后再保存缓存
+    try:
+        return run(lister, args)
+    finally:
+        if cache is not None:
+            try:
+                cache.save()
+            except OSError as e:
+                print(f"⚠️  警告: 无法写入缓存 {cache.cache_path}: {e}", file=sys.stderr)
+            if args.cache_stats:
+                print(f"缓存: 命中 {cache.hits}，未命中 {cache.misses}", file=sys.stderr)
+        if tracer is not None:
+            tracer.disable()
+            tracer.dump_stats(args.trace)
+        if profiler is not None:
+            write_profile(profiler.report(), args.profile)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Skill Context Budget
+
+估算每个技能占用的上下文：名称和描述始终加载，SKILL.md 正文在技能触发时加载，
+references/ 下的参考文件在被打开时加载。统计各部分的字节数和近似 token 数。
+"""
+
+import os
+import math
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 近似 token 数：ASCII 文本约 4 个字符一个 token，中文等非 ASCII 字符约 1 个字符一个 token
+ASCII_CHARS_PER_TOKEN = 4
+
+# 参与汇总的数值字段
+BUDGET_FIELDS = (
+    'description_bytes', 'description_tokens',
+    'frontmatter_bytes', 'frontmatter_tokens',
+    'body_bytes', 'body_tokens',
+    'reference_count', 'reference_bytes', 'reference_tokens',
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数"""
+    ascii_count = len(text.encode('ascii', 'ignore'))
+    return math.ceil(ascii_count / ASCII_CHARS_PER_TOKEN) + len(text) - ascii_count
+
+
+def split_frontmatter(text: str) -> Tuple[str, str]:
+    """把 SKILL.md 拆分为 frontmatter（含 --- 分隔行）和正文"""
+    if not text.startswith('---'):
+        return '', text
+    end = text.find('\n---', 3)
+    if end < 0:
+        return text, ''
+    newline = text.find('\n', end + 4)
+    if newline < 0:
+        return text, ''
+    return text[:newline + 1], text[newline + 1:]
+
+
+def list_references(skill_path: Path) -> List[Tuple[Path, int, int]]:
+    """列出 references/ 下的文件 (路径, mtime_ns, 大小)，按路径排序"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(skill_path / 'references'):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            path = Path(dirpath, filename)
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((path, st.st_mtime_ns, st.st_size))
+    files.sort()
+    return files
+
+
+def reference_signature(files: Iterable[Tuple[Path, int, int]]) -> str:
+    """参考文件集合及其状态的签名（任一文件增删或修改都会改变）"""
+    digest = hashlib.sha1()
+    for path, mtime_ns, size in files:
+        digest.update(f"{path}\0{mtime_ns}\0{size}\n".encode('utf-8', 'surrogateescape'))
+    return digest.hexdigest()
+
+
+def measure_skill(
+    skill_path: Path,
+    name: str,
+    description: str,
+    references: Optional[List[Tuple[Path, int, int]]] = None
+) -> Dict[str, int]:
+    """统计单个技能的上下文成本
+
+    常驻部分按 "名称: 描述" 计算；二进制参考文件只计字节数，不计 token。
+    """
+    always = f"{name}: {description}"
+    budget = dict.fromkeys(BUDGET_FIELDS, 0)
+    budget['description_bytes'] = len(always.encode('utf-8'))
+    budget['description_tokens'] = estimate_tokens(always)
+
+    try:
+        text = (skill_path / 'SKILL.md').read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        text = ''
+    frontmatter, body = split_frontmatter(text)
+    budget['frontmatter_bytes'] = len(frontmatter.encode('utf-8'))
+    budget['frontmatter_tokens'] = estimate_tokens(frontmatter)
+    budget['body_bytes'] = len(body.encode('utf-8'))
+    budget['body_tokens'] = estimate_tokens(body)
+
+    if references is None:
+        references = list_references(skill_path)
+    for path, _, _ in references:
+        try:
+            data = path.read_bytes()
+        except OSError:
+            continue
+        budget['reference_count'] += 1
+        budget['reference_bytes'] += len(data)
+        try:
+            budget['reference_tokens'] += estimate_tokens(data.decode('utf-8'))
+        except UnicodeDecodeError:
+            pass
+    return budget
+
+
+def sum_budgets(budgets: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    """汇总多个技能的成本"""
+    total = dict.fromkeys(BUDGET_FIELDS, 0)
+    total['skill_count'] = 0
+    for budget in budgets:
+        total['skill_count'] += 1
+        for field in BUDGET_FIELDS:
+            total[field] += budget.get(field, 0)
+    return total
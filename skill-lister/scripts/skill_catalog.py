@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Skill Catalog
+
+把已解析的技能信息 (SkillInfo.to_dict()) 保存在本地 SQLite 数据库中，按级别、作者、版本、
+许可证和允许的工具过滤时直接执行 SQL 查询，无需逐个构造 SkillInfo。name/level/author/version
+列上有索引，名称和描述另有 FTS5 全文索引（SQLite 未编译 FTS5 时退化为 LIKE 匹配）。
+
+sync() 增量同步：只列出根目录并比较每个技能的状态戳（与 SkillCache 相同），
+新增或修改过的技能才重新解析，已删除的技能从数据库中移除。
+
+    from skill_catalog import SkillCatalog
+    with SkillCatalog() as catalog:
+        catalog.sync(lister, paths)
+        skills = catalog.query(paths, author='john-doe', tool='Bash')
+"""
+
+import os
+import re
+import json
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import skill_profile
+from skill_profile import profiled
+from list_skills import SkillCache, SkillInfo, get_cache_dir
+
+
+# 数据库结构版本，不一致时重建
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE skills (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    root TEXT NOT NULL,
+    level TEXT NOT NULL,
+    stamp TEXT,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL,
+    version TEXT,
+    author TEXT,
+    license TEXT,
+    is_valid INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX skills_root ON skills (root);
+CREATE INDEX skills_name ON skills (name);
+CREATE INDEX skills_level ON skills (level);
+CREATE INDEX skills_author ON skills (author);
+CREATE INDEX skills_version ON skills (version);
+CREATE TABLE skill_tools (
+    skill_id INTEGER NOT NULL REFERENCES skills (id) ON DELETE CASCADE,
+    tool TEXT NOT NULL
+);
+CREATE INDEX skill_tools_tool ON skill_tools (tool, skill_id);
+CREATE INDEX skill_tools_skill ON skill_tools (skill_id);
+"""
+
+# 全文索引与 skills 表同步（外部内容表，由触发器维护）
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE skills_fts USING fts5(name, description, content='skills', content_rowid='id');
+CREATE TRIGGER skills_fts_insert AFTER INSERT ON skills BEGIN
+    INSERT INTO skills_fts (rowid, name, description) VALUES (new.id, new.name, new.description);
+END;
+CREATE TRIGGER skills_fts_delete AFTER DELETE ON skills BEGIN
+    INSERT INTO skills_fts (skills_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+END;
+"""
+
+# 全文检索时名称的权重（相对描述）
+NAME_WEIGHT = 5.0
+
+
+def get_catalog_path() -> Path:
+    """获取技能目录数据库路径"""
+    return get_cache_dir() / 'skills-catalog.db'
+
+
+def fts_query(text: str) -> Optional[str]:
+    """把搜索关键词转换为 FTS5 查询：每个词前缀匹配，任一词命中即可（按 bm25 排序）"""
+    terms = re.findall(r'\w+', text.lower())
+    if not terms:
+        return None
+    return ' OR '.join(f'"{term}"*' for term in terms)
+
+
+class SkillCatalog:
+    """SQLite 技能目录"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or get_catalog_path()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute('PRAGMA foreign_keys = ON')
+        # 允许同时运行的多个列表命令并发读取
+        self.conn.execute('PRAGMA journal_mode = WAL')
+        self.has_fts = self._init_schema()
+
+    def __enter__(self) -> 'SkillCatalog':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _init_schema(self) -> bool:
+        """创建（或在版本不一致时重建）数据库结构，返回是否启用了全文索引"""
+        conn = self.conn
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if version == CATALOG_VERSION and 'skills' in tables:
+            return 'skills_fts' in tables
+
+        with conn:
+            for name in ('skills_fts', 'skill_tools', 'skills'):
+                conn.execute(f'DROP TABLE IF EXISTS {name}')
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                has_fts = True
+            except sqlite3.OperationalError:
+                # SQLite 未编译 FTS5
+                has_fts = False
+            conn.execute(f'PRAGMA user_version = {CATALOG_VERSION}')
+        return has_fts
+
+    @profiled('catalog_sync')
+    def sync(self, lister, paths: List[Tuple[Path, str]]) -> Tuple[int, int]:
+        """增量同步根目录下的技能，返回 (更新数, 删除数)"""
+        updated = removed = 0
+        with self.conn:
+            for root, level in paths:
+                # 以绝对路径保存，相对路径的根目录在不同工作目录下不会混淆
+                root = Path(os.path.abspath(root))
+                stored = dict(self.conn.execute(
+                    'SELECT path, stamp FROM skills WHERE root = ?', (str(root),)
+                ))
+                for skill in lister.iter_skills([(root, level)]):
+                    path = str(skill.path)
+                    key = SkillCache.make_key(skill.path)
+                    stamp = json.dumps(key) if key is not None else None
+                    old = stored.pop(path, False)
+                    if stamp is not None and old == stamp:
+                        continue
+                    self._store(root, stamp, skill.resolve())
+                    updated += 1
+
+                # 已删除的技能
+                for path in stored:
+                    self.conn.execute('DELETE FROM skills WHERE path = ?', (path,))
+                    removed += 1
+
+        skill_profile.count('catalog_updated', updated)
+        return updated, removed
+
+    def _store(self, root: Path, stamp: Optional[str], skill: SkillInfo):
+        data = skill.to_dict()
+        version = skill.version
+        author = skill.author
+
+        conn = self.conn
+        conn.execute('DELETE FROM skills WHERE path = ?', (data['path'],))
+        cursor = conn.execute(
+            'INSERT INTO skills (path, root, level, stamp, name, description, version, author, license, is_valid, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                data['path'], str(root), skill.level, stamp,
+                str(skill.name), str(skill.description or ''),
+                str(version) if version is not None else None,
+                str(author) if author is not None else None,
+                str(skill.license) if skill.license is not None else None,
+                int(bool(skill.is_valid)),
+                json.dumps(data, ensure_ascii=False, default=str),
+            )
+        )
+        conn.executemany(
+            'INSERT INTO skill_tools (skill_id, tool) VALUES (?, ?)',
+            [(cursor.lastrowid, tool) for tool in dict.fromkeys(skill.allowed_tools)]
+        )
+
+    @profiled('catalog_query')
+    def query(
+        self,
+        paths: List[Tuple[Path, str]],
+        search: Optional[str] = None,
+        level: Optional[str] = None,
+        author: Optional[str] = None,
+        version: Optional[str] = None,
+        license: Optional[str] = None,
+        tool: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[SkillInfo]:
+        """按条件查询技能
+
+        有搜索关键词时按相关度降序返回（FTS5 bm25，名称权重更高），limit 限制返回前 k 个结果；
+        否则按路径排序。
+        """
+        if not paths:
+            return []
+
+        tables = 'skills s'
+        clauses = [f"s.root IN ({', '.join('?' * len(paths))})"]
+        params = [os.path.abspath(root) for root, _ in paths]
+        order = 's.path'
+
+        if level:
+            # 'user' 同时匹配 'user-AgentSkills' 等带规范后缀的级别
+            clauses.append('(s.level = ? OR s.level GLOB ?)')
+            params += [level, level + '-*']
+        for column, value in (('author', author), ('version', version), ('license', license)):
+            if value is not None:
+                clauses.append(f's.{column} = ?')
+                params.append(value)
+        if tool:
+            clauses.append('s.id IN (SELECT skill_id FROM skill_tools WHERE tool = ?)')
+            params.append(tool)
+
+        if search:
+            match = fts_query(search)
+            if match is None:
+                return []
+            if self.has_fts:
+                tables += ' JOIN skills_fts f ON f.rowid = s.id'
+                clauses.append('skills_fts MATCH ?')
+                params.append(match)
+                order = f'bm25(skills_fts, {NAME_WEIGHT}, 1.0)'
+            else:
+                clauses.append("(s.name LIKE ? ESCAPE '\\' OR s.description LIKE ? ESCAPE '\\')")
+                pattern = '%' + re.sub(r'([\\%_])', r'\\\1', search) + '%'
+                params += [pattern, pattern]
+
+        sql = f"SELECT s.data FROM {tables} WHERE {' AND '.join(clauses)} ORDER BY {order}"
+        if search and limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        return [SkillInfo.from_dict(json.loads(data)) for data, in self.conn.execute(sql, params)]
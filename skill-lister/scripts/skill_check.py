@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Skill Format Check
+
+检查技能格式。每个技能先按 skill-lister 的规则解析 frontmatter（SKILL.md 缺失、YAML 错误、
+缺少必需字段、目录名不一致），再按 skill-installer 的 validate_skill 检查安装时的规则
+（名称格式、描述长度等）。YAML 解析是 CPU 密集型操作，技能较多时用进程池分散到多个核心。
+
+检查结果可输出为 JSON 或 SARIF 2.1.0，供 CI 和代码扫描工具读取。
+
+增量检查时只验证 git 修订范围内改动过的技能，名称冲突仍对照全部技能检查；
+其余技能的名称来自 SkillCache（按文件状态校验），无需重新解析。
+
+    from skill_check import check_skills, to_sarif
+    results = check_skills([(path, 'custom') for path in paths], workers=8)
+    print(json.dumps(to_sarif(results)))
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from list_skills import SkillInfo
+
+# 可选：复用 skill-installer 的安装验证规则（两个技能安装在同一目录下时可用）
+_INSTALLER_SCRIPTS = Path(__file__).resolve().parent.parent.parent / 'skill-installer' / 'scripts'
+
+# 检查规则 (id -> 说明)
+RULES = {
+    'frontmatter': 'SKILL.md 必须存在，且以包含 name 和 description 的 YAML frontmatter 开头',
+    'install-validation': '技能必须满足 skill-installer 的安装验证规则（名称格式、目录名、描述长度）',
+    'directory-name': '技能目录名应与 name 字段一致',
+    'duplicate-name': '同一级别下的技能名称不能重复',
+}
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+# 每个进程只加载一次安装器（False 表示不可用）
+_validator = None
+
+
+def installer_validator() -> Optional[Callable[[Path], Tuple[bool, str]]]:
+    """skill-installer 的 validate_skill，不可用时返回 None"""
+    global _validator
+    if _validator is None:
+        if (_INSTALLER_SCRIPTS / 'install_skill.py').exists() and str(_INSTALLER_SCRIPTS) not in sys.path:
+            sys.path.append(str(_INSTALLER_SCRIPTS))
+        try:
+            from install_skill import SkillInstaller
+        except ImportError:
+            _validator = False
+        else:
+            _validator = SkillInstaller().validate_skill
+    return _validator or None
+
+
+def finding(rule: str, level: str, message: str) -> Dict:
+    return {'rule': rule, 'level': level, 'message': message}
+
+
+def check_result(skill: SkillInfo) -> Dict:
+    """检查单个技能，返回 {name, path, level, status, findings}"""
+    findings = [finding('frontmatter', 'error', error) for error in skill.errors]
+    warnings = list(skill.warnings)
+
+    # 安装规则更严格，只对 skill-lister 能解析的技能检查
+    validate = installer_validator()
+    if skill.is_valid and validate is not None:
+        valid, message = validate(skill.path)
+        if not valid:
+            findings.append(finding('install-validation', 'error', message))
+            # 目录名不一致在安装时是错误，不再重复报告为警告
+            warnings = [warning for warning in warnings if warning != message]
+    findings.extend(finding('directory-name', 'warning', warning) for warning in warnings)
+
+    if any(item['level'] == 'error' for item in findings):
+        status = 'error'
+    elif findings:
+        status = 'warning'
+    else:
+        status = 'ok'
+
+    return {
+        'name': skill.name,
+        'path': str(skill.path),
+        'level': skill.level,
+        'status': status,
+        'findings': findings,
+    }
+
+
+def check_skill(path: str, level: str) -> Dict:
+    """检查一个技能目录（进程池的工作函数，参数和结果都可以被 pickle）"""
+    return check_result(SkillInfo(Path(path), level))
+
+
+def check_skills(
+    items: List[Tuple[Path, str]],
+    workers: int = 1,
+    names: Optional[Dict[Tuple[str, str], List[str]]] = None
+) -> List[Dict]:
+    """检查一组 (技能目录, 级别)，结果按技能名称排序
+
+    workers > 1 时使用进程池并行解析和验证。names 是全部技能的名称索引（见 name_index），
+    用于检查名称冲突；未提供时只在本次检查的技能之间检查。
+    """
+    paths = [str(path) for path, _ in items]
+    levels = [level for _, level in items]
+
+    # 检查是 CPU 密集型操作，进程数超过核心数没有收益
+    workers = min(workers, os.cpu_count() or 1)
+    if workers > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # 在主进程中先加载安装器，fork 出的工作进程无需各自导入
+        installer_validator()
+        # 分块提交，减少进程间通信次数
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(check_skill, paths, levels, chunksize=chunksize))
+    else:
+        results = [check_skill(path, level) for path, level in zip(paths, levels)]
+
+    if names is None:
+        names = name_index(
+            (result['level'], result['name'], result['path'])
+            for result in results
+            if not any(item['rule'] == 'frontmatter' for item in result['findings'])
+        )
+    add_collisions(results, names)
+
+    results.sort(key=lambda result: (result['name'], result['path']))
+    return results
+
+
+def name_index(entries: Iterable[Tuple[str, str, str]]) -> Dict[Tuple[str, str], List[str]]:
+    """由 (级别, 名称, 路径) 建立名称索引 {(级别, 名称): [路径, ...]}"""
+    index = {}
+    for level, name, path in entries:
+        index.setdefault((level, name), []).append(path)
+    return index
+
+
+def add_collisions(results: List[Dict], names: Dict[Tuple[str, str], List[str]]):
+    """同一级别下有其他技能使用相同名称时记录错误"""
+    for result in results:
+        others = [path for path in names.get((result['level'], result['name']), ()) if path != result['path']]
+        if not others:
+            continue
+        result['findings'].append(finding(
+            'duplicate-name', 'error',
+            f"技能名称 {result['name']} 与其他技能重复: {', '.join(sorted(others))}"
+        ))
+        result['status'] = 'error'
+
+
+def git_changed_files(rev_range: str, cwd: Optional[Path] = None) -> List[Path]:
+    """列出 git 修订范围内改动过的文件（绝对路径，包括已删除的文件和重命名前的路径）
+
+    rev_range 原样传给 git diff，如 origin/main...HEAD；只给一个提交时与工作区比较。
+    git 不可用或修订范围无效时抛出 RuntimeError。
+    """
+    def git(*args) -> str:
+        try:
+            proc = subprocess.run(['git', *args], cwd=cwd, capture_output=True)
+        except OSError as e:
+            raise RuntimeError(f"无法运行 git: {e}")
+        if proc.returncode != 0:
+            message = proc.stderr.decode('utf-8', 'replace').strip()
+            raise RuntimeError(f"git {' '.join(args)} 失败: {message}")
+        return os.fsdecode(proc.stdout)
+
+    top = Path(git('rev-parse', '--show-toplevel').strip())
+    output = git('diff', '--name-only', '--no-renames', '-z', rev_range, '--')
+    return [top / name for name in output.split('\0') if name]
+
+
+def owning_skills(files: Iterable[Path], roots: List[Tuple[Path, str]]) -> List[Tuple[Path, str]]:
+    """把改动的文件映射到所属的技能目录 (技能目录, 级别)
+
+    只保留仍然存在的技能目录；根目录下的独立文件（如清单）和已删除的技能会被忽略。
+    """
+    real_roots = [(Path(os.path.realpath(root)), root, level) for root, level in roots]
+    skills = {}
+    for path in files:
+        real = Path(os.path.realpath(path))
+        for real_root, root, level in real_roots:
+            try:
+                parts = real.relative_to(real_root).parts
+            except ValueError:
+                continue
+            if len(parts) > 1 and not parts[0].startswith('.'):
+                skill_dir = root / parts[0]
+                if skill_dir.is_dir():
+                    skills.setdefault(skill_dir, level)
+            break
+    return list(skills.items())
+
+
+def summarize(results: List[Dict]) -> Dict[str, int]:
+    """按状态统计技能数量"""
+    summary = {'total': len(results), 'ok': 0, 'warning': 0, 'error': 0}
+    for result in results:
+        summary[result['status']] += 1
+    return summary
+
+
+def to_json(results: List[Dict]) -> Dict:
+    """JSON 输出"""
+    return {'summary': summarize(results), 'results': results}
+
+
+def _artifact_uri(skill_path: str) -> str:
+    """SKILL.md 的位置：在当前目录下时用相对路径（代码扫描平台按仓库相对路径定位），否则用 file URI"""
+    skill_md = Path(os.path.abspath(skill_path)) / 'SKILL.md'
+    try:
+        return skill_md.relative_to(Path.cwd()).as_posix()
+    except ValueError:
+        return skill_md.as_uri()
+
+
+def to_sarif(results: List[Dict]) -> Dict:
+    """SARIF 2.1.0 输出"""
+    sarif_results = []
+    for result in results:
+        uri = _artifact_uri(result['path'])
+        for item in result['findings']:
+            sarif_results.append({
+                'ruleId': item['rule'],
+                'level': item['level'],
+                'message': {'text': f"{result['name']}: {item['message']}"},
+                'locations': [{
+                    'physicalLocation': {
+                        'artifactLocation': {'uri': uri},
+                        'region': {'startLine': 1},
+                    }
+                }],
+            })
+
+    return {
+        '$schema': SARIF_SCHEMA,
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {
+                'driver': {
+                    'name': 'skill-lister',
+                    'rules': [
+                        {'id': rule, 'shortDescription': {'text': text}}
+                        for rule, text in RULES.items()
+                    ],
+                }
+            },
+            'results': sarif_results,
+        }],
+    }
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Skill Search Index
+
+技能搜索索引：基于倒排索引的 BM25 排序检索。
+索引覆盖技能名称、描述和元数据字段，名称命中有更高的权重。
+TrigramIndex 提供基于三元组的模糊匹配，用于容错搜索和相似名称提示。
+"""
+
+import re
+import json
+import math
+import heapq
+import hashlib
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# 字段权重：名称命中优先于描述和元数据
+FIELD_BOOSTS = {
+    'name': 3.0,
+    'description': 1.0,
+    'metadata': 0.5,
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 前缀匹配（如 "proc" 匹配 "processor"）的得分折扣
+PREFIX_DISCOUNT = 0.5
+
+# 模糊匹配（如 "convertor" 匹配 "converter"）的得分折扣和最低相似度
+FUZZY_DISCOUNT = 0.3
+FUZZY_THRESHOLD = 0.5
+# 参与模糊匹配的最短查询词
+FUZZY_MIN_LENGTH = 3
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+')
+
+
+def _is_cjk(word: str) -> bool:
+    return word[0] >= '\u3400'
+
+
+def tokenize(text: str, query: bool = False) -> List[str]:
+    """分词：英文和数字按单词切分，中文按单字加相邻双字切分
+
+    查询时多字中文只取相邻双字，减少需要合并的倒排列表。
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        word = match.group()
+        if _is_cjk(word):
+            if not query or len(word) == 1:
+                tokens.extend(word)
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def trigrams(text: str) -> Set[str]:
+    """字符三元组（首尾补空格，使短词和词首也有区分度）"""
+    padded = f"  {text.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """三元组倒排索引
+
+    通过共享三元组的倒排列表生成候选，再按 Dice 系数计算相似度，
+    无需与每个词逐一比较。
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words = []
+        self._sizes = []
+        self._ids = {}
+        self.postings = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str):
+        """添加词（重复的词忽略）"""
+        if word in self._ids:
+            return
+        word_id = len(self.words)
+        self._ids[word] = word_id
+        self.words.append(word)
+        grams = trigrams(word)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(word_id)
+
+    def similar(
+        self,
+        word: str,
+        limit: Optional[int] = 5,
+        threshold: float = FUZZY_THRESHOLD
+    ) -> List[Tuple[str, float]]:
+        """返回相似度不低于 threshold 的词，按相似度降序"""
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for word_id in self.postings.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        matches = []
+        for word_id, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._sizes[word_id])
+            if score >= threshold:
+                matches.append((self.words[word_id], score))
+
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches if limit is None else matches[:limit]
+
+
+def skill_fields(skill) -> Dict[str, str]:
+    """提取参与索引的字段文本"""
+    metadata = skill.metadata
+    if isinstance(metadata, dict):
+        metadata_text = ' '.join(str(value) for value in metadata.values() if value is not None)
+    else:
+        metadata_text = ''
+    return {
+        'name': str(skill.name or ''),
+        'description': str(skill.description or ''),
+        'metadata': metadata_text,
+    }
+
+
+def index_signature(entries: Iterable[Tuple[str, Optional[List[int]]]]) -> str:
+    """根据 (技能路径, 缓存键) 序列计算索引签名，任一技能变化都会改变签名"""
+    digest = hashlib.sha1()
+    for path, key in entries:
+        digest.update(json.dumps([path, key]).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SearchIndex:
+    """词项倒排索引
+
+    文档编号即建索引时技能列表中的位置。postings 中直接记录每个 (词项, 文档) 的 BM25 得分
+    （词频按字段权重加权），并按得分降序排列：查询时只需累加，单词项查询可直接截取前 k 个。
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self.signature = None
+        self.doc_count = 0
+        self.doc_lengths = []
+        self.avg_length = 0.0
+        self.postings = {}
+        self._terms = None
+        self._fuzzy = None
+
+    @classmethod
+    def build(cls, skills: List, signature: Optional[str] = None) -> 'SearchIndex':
+        """从技能列表构建索引"""
+        index = cls()
+        index.signature = signature
+        index.doc_count = len(skills)
+
+        # 加权词频
+        frequencies = {}
+        for doc_id, skill in enumerate(skills):
+            length = 0.0
+            for field, text in skill_fields(skill).items():
+                boost = FIELD_BOOSTS[field]
+                for token in tokenize(text):
+                    weights = frequencies.setdefault(token, {})
+                    weights[doc_id] = weights.get(doc_id, 0.0) + boost
+                    length += boost
+            index.doc_lengths.append(length)
+
+        if index.doc_count:
+            index.avg_length = sum(index.doc_lengths) / index.doc_count
+        avg_length = index.avg_length or 1.0
+
+        # 预先计算 BM25 得分
+        for token, weights in frequencies.items():
+            df = len(weights)
+            idf = math.log(1 + (index.doc_count - df + 0.5) / (df + 0.5))
+            postings = [
+                [doc_id, round(idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * index.doc_lengths[doc_id] / avg_length)
+                ), 6)]
+                for doc_id, tf in weights.items()
+            ]
+            postings.sort(key=lambda posting: (-posting[1], posting[0]))
+            index.postings[token] = postings
+        return index
+
+    @property
+    def terms(self) -> List[str]:
+        """排序后的词表（用于前缀匹配）"""
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        return self._terms
+
+    @property
+    def fuzzy(self) -> TrigramIndex:
+        """词表的三元组索引（首次需要模糊匹配时构建）"""
+        if self._fuzzy is None:
+            self._fuzzy = TrigramIndex(
+                term for term in self.postings
+                if len(term) >= FUZZY_MIN_LENGTH and not _is_cjk(term)
+            )
+        return self._fuzzy
+
+    def expand(self, token: str, fuzzy: bool = True) -> List[Tuple[str, float]]:
+        """查询词展开
+
+        精确匹配权重为 1，前缀匹配打折；两者都没有时按三元组相似度模糊匹配。
+        """
+        matches = []
+        if token in self.postings:
+            matches.append((token, 1.0))
+        terms = self.terms
+        i = bisect_left(terms, token)
+        while i < len(terms) and terms[i].startswith(token):
+            if terms[i] != token:
+                matches.append((terms[i], PREFIX_DISCOUNT))
+            i += 1
+
+        if not matches and fuzzy and len(token) >= FUZZY_MIN_LENGTH and not _is_cjk(token):
+            matches = [
+                (term, FUZZY_DISCOUNT * score)
+                for term, score in self.fuzzy.similar(token, limit=3)
+            ]
+        return matches
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        candidates: Optional[Set[int]] = None,
+        fuzzy: bool = True
+    ) -> List[Tuple[int, float]]:
+        """BM25 检索，返回按得分降序排列的 (文档编号, 得分)"""
+        expanded = [
+            match for token in set(tokenize(query, query=True))
+            for match in self.expand(token, fuzzy)
+        ]
+
+        # 只命中一个词项时倒排列表本身就是有序结果
+        if len(expanded) == 1 and limit is not None:
+            term, factor = expanded[0]
+            hits = []
+            for doc_id, score in self.postings[term]:
+                if candidates is None or doc_id in candidates:
+                    hits.append((doc_id, factor * score))
+                    if len(hits) == limit:
+                        break
+            return hits
+
+        scores = {}
+        for term, factor in expanded:
+            self._accumulate(term, factor, scores, candidates)
+
+        if limit is not None:
+            return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def _accumulate(
+        self,
+        term: str,
+        factor: float,
+        scores: Dict[int, float],
+        candidates: Optional[Set[int]]
+    ):
+        get = scores.get
+        if candidates is None:
+            for doc_id, score in self.postings[term]:
+                scores[doc_id] = get(doc_id, 0.0) + factor * score
+        else:
+            for doc_id, score in self.postings[term]:
+                if doc_id in candidates:
+                    scores[doc_id] = get(doc_id, 0.0) + factor * score
+
+    def save(self, path: Path):
+        """原子写入索引文件"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            'version': self.VERSION,
+            'signature': self.signature,
+            'doc_count': self.doc_count,
+            'doc_lengths': self.doc_lengths,
+            'avg_length': self.avg_length,
+            'postings': self.postings,
+        }
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, signature: Optional[str] = None) -> Optional['SearchIndex']:
+        """加载索引文件，版本或签名不匹配时返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != cls.VERSION:
+            return None
+        if signature is not None and data.get('signature') != signature:
+            return None
+
+        index = cls()
+        index.signature = data['signature']
+        index.doc_count = data['doc_count']
+        index.doc_lengths = data['doc_lengths']
+        index.avg_length = data['avg_length']
+        index.postings = data['postings']
+        return index
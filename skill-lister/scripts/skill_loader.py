@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Skill Loader
+
+按需分层加载技能内容（渐进式披露）：
+    第一层 metadata()  只解析 frontmatter，返回 SkillInfo
+    第二层 body()      读取 SKILL.md 正文
+    第三层 resource()  读取 references/ 或 scripts/ 下的单个文件
+
+每层各有一个按大小限制的 LRU 缓存，条目以文件的 mtime/size/inode 校验，文件修改后自动失效。
+多个会话并发请求同一个文件时只读取一次。
+
+    from skill_loader import SkillLoader
+    loader = SkillLoader()
+    skill = loader.metadata('pdf-processor')
+    text = loader.body(skill)
+    ref = loader.resource(skill, 'references/REFERENCE.md')
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Union
+
+from list_skills import SkillCache, SkillInfo, SkillLister
+from skill_budget import split_frontmatter
+
+
+# 第三层允许访问的子目录
+RESOURCE_DIRS = ('references', 'scripts')
+
+# 各层缓存的默认上限
+DEFAULT_METADATA_ENTRIES = 1024
+DEFAULT_BODY_BYTES = 8 * 1024 * 1024
+DEFAULT_RESOURCE_BYTES = 32 * 1024 * 1024
+
+
+def file_stamp(path: Path) -> Optional[tuple]:
+    """文件状态戳，文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class LRUCache:
+    """按大小限制的 LRU 缓存
+
+    每个条目带有状态戳，戳不一致时视为未命中并重新加载。同一个键的并发未命中只加载一次，
+    其余调用方等待第一个加载完成。sizeof 计算条目占用的大小（默认每个条目计 1）。
+    """
+
+    def __init__(self, max_size: int, sizeof: Callable = lambda value: 1):
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, stamp, load: Callable):
+        """返回缓存的值；未命中或状态戳变化时调用 load() 加载"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # 其他线程正在加载同一个键
+            pending.wait()
+
+        try:
+            value = load()
+            with self._lock:
+                self._store(key, stamp, value)
+            return value
+        finally:
+            with self._lock:
+                del self._loading[key]
+            pending.set()
+
+    def _store(self, key: Hashable, stamp, value):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old[2]
+        size = self.sizeof(value)
+        if size > self.max_size:
+            # 单个条目超过上限时不缓存
+            return
+        self._entries[key] = (stamp, value, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """使缓存失效：指定键则只删除该条目，否则清空全部"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self.size -= old[2]
+
+    def invalidate_prefix(self, prefix: str):
+        """删除键以 prefix 开头的所有条目"""
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self.size -= self._entries.pop(key)[2]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'entries': len(self._entries),
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class SkillLoader:
+    """分层技能加载器（线程安全，可在多个会话间共享）"""
+
+    def __init__(
+        self,
+        lister: Optional[SkillLister] = None,
+        metadata_entries: int = DEFAULT_METADATA_ENTRIES,
+        body_bytes: int = DEFAULT_BODY_BYTES,
+        resource_bytes: int = DEFAULT_RESOURCE_BYTES
+    ):
+        self.lister = lister or SkillLister()
+        self.metadata_cache = LRUCache(metadata_entries)
+        self.body_cache = LRUCache(body_bytes, sizeof=lambda text: len(text.encode('utf-8')))
+        self.resource_cache = LRUCache(resource_bytes, sizeof=len)
+
+    def locate(self, name: str) -> Optional[SkillInfo]:
+        """按目录名在各技能根目录中查找技能（按根目录优先级返回第一个）"""
+        for skill_dir, level in self.lister.get_all_skills_dirs():
+            path = skill_dir / name
+            if path.is_dir():
+                return self.lister.load_skill(path, level)
+        return None
+
+    def _skill(self, skill: Union[SkillInfo, str]) -> SkillInfo:
+        if isinstance(skill, SkillInfo):
+            return skill
+        found = self.locate(skill)
+        if found is None:
+            raise FileNotFoundError(f"未找到技能: {skill}")
+        return found
+
+    def metadata(self, skill: Union[SkillInfo, str]) -> SkillInfo:
+        """第一层：只解析 frontmatter 的技能信息"""
+        skill = self._skill(skill)
+        path, level = skill.path, skill.level
+
+        def load() -> SkillInfo:
+            return self.lister.load_skill(path, level).resolve()
+
+        return self.metadata_cache.get(str(path), SkillCache.make_key(path), load)
+
+    def body(self, skill: Union[SkillInfo, str]) -> str:
+        """第二层：SKILL.md 正文（不含 frontmatter）"""
+        skill_md = self._skill(skill).path / 'SKILL.md'
+        stamp = file_stamp(skill_md)
+        if stamp is None:
+            raise FileNotFoundError(f"缺少 SKILL.md 文件: {skill_md}")
+        return self.body_cache.get(
+            str(skill_md), stamp,
+            lambda: split_frontmatter(skill_md.read_text(encoding='utf-8'))[1]
+        )
+
+    def resource_path(self, skill: Union[SkillInfo, str], relative: str) -> Path:
+        """解析资源路径，只允许 references/ 和 scripts/ 下的文件"""
+        root = self._skill(skill).path.resolve()
+        path = (root / relative).resolve()
+        allowed = [str(root / name) + os.sep for name in RESOURCE_DIRS]
+        if not any(str(path).startswith(prefix) for prefix in allowed):
+            raise ValueError(f"只能读取 {'/、'.join(RESOURCE_DIRS)}/ 下的文件: {relative}")
+        return path
+
+    def resource_bytes(self, skill: Union[SkillInfo, str], relative: str) -> bytes:
+        """第三层：references/ 或 scripts/ 下单个文件的原始内容"""
+        path = self.resource_path(skill, relative)
+        stamp = file_stamp(path)
+        if stamp is None:
+            raise FileNotFoundError(f"文件不存在: {path}")
+        return self.resource_cache.get(str(path), stamp, path.read_bytes)
+
+    def resource(self, skill: Union[SkillInfo, str], relative: str) -> str:
+        """第三层：references/ 或 scripts/ 下单个文件的文本内容"""
+        return self.resource_bytes(skill, relative).decode('utf-8')
+
+    def list_resources(self, skill: Union[SkillInfo, str]) -> List[str]:
+        """列出可按需加载的资源文件（相对技能目录的路径）"""
+        root = self._skill(skill).path
+        resources = []
+        for name in RESOURCE_DIRS:
+            base = root / name
+            for dirpath, dirnames, filenames in os.walk(base):
+                dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+                for filename in sorted(filenames):
+                    if not filename.startswith('.'):
+                        resources.append(Path(dirpath, filename).relative_to(root).as_posix())
+        return resources
+
+    def invalidate(self, skill: Optional[Union[SkillInfo, str]] = None):
+        """清除缓存：指定技能则只清除该技能的各层条目，否则全部清空"""
+        if skill is None:
+            for cache in (self.metadata_cache, self.body_cache, self.resource_cache):
+                cache.invalidate()
+            return
+
+        path = self._skill(skill).path
+        self.metadata_cache.invalidate(str(path))
+        self.body_cache.invalidate(str(path / 'SKILL.md'))
+        self.resource_cache.invalidate_prefix(str(path.resolve()) + os.sep)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各层缓存的统计信息"""
+        return {
+            'metadata': self.metadata_cache.stats(),
+            'body': self.body_cache.stats(),
+            'resource': self.resource_cache.stats(),
+        }
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Skill Profiling
+
+分阶段计时和操作计数。未启用时 phase() 返回共享的空上下文、count() 直接返回，
+几乎没有开销；启用后记录每个阶段的调用次数、总耗时和自身耗时（扣除嵌套的子阶段），
+stat/read 等系统调用密集操作的次数、读取的字节数以及最慢的 N 个技能。
+
+    import skill_profile
+    profiler = skill_profile.enable()
+    with skill_profile.phase('list_dirs'):
+        ...
+    skill_profile.count('stats', 2)
+
+    @skill_profile.profiled('render')
+    def render(...): ...
+
+    print(json.dumps(profiler.report()))
+"""
+
+import time
+import heapq
+import functools
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+
+
+class Profiler:
+    """阶段计时器（线程安全；并发扫描时各线程的耗时累加）"""
+
+    def __init__(self, slowest: int = 10):
+        self.slowest = slowest
+        self.phases = {}
+        self.counters = {}
+        self.skills = []
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name: str):
+        """计时一个阶段；嵌套阶段的耗时从外层阶段的自身耗时中扣除"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        frame = [0.0]  # 子阶段耗时
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            if stack:
+                stack[-1][0] += elapsed
+            with self._lock:
+                stats = self.phases.get(name)
+                if stats is None:
+                    stats = self.phases[name] = [0, 0.0, 0.0]
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += elapsed - frame[0]
+
+    def count(self, name: str, n: int = 1):
+        """累加计数器"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_skill(self, path, seconds: float):
+        """记录单个技能的处理耗时，只保留最慢的 N 个"""
+        with self._lock:
+            item = (seconds, str(path))
+            if len(self.skills) < self.slowest:
+                heapq.heappush(self.skills, item)
+            elif item > self.skills[0]:
+                heapq.heapreplace(self.skills, item)
+
+    def report(self) -> Dict:
+        """生成 JSON 可序列化的报告"""
+        with self._lock:
+            phases = {
+                name: {'calls': calls, 'total_ms': round(total * 1000, 3), 'self_ms': round(own * 1000, 3)}
+                for name, (calls, total, own) in sorted(self.phases.items(), key=lambda item: -item[1][2])
+            }
+            return {
+                'wall_ms': round((time.perf_counter() - self.started) * 1000, 3),
+                'phases': phases,
+                'counters': dict(sorted(self.counters.items())),
+                'slowest_skills': [
+                    {'path': path, 'ms': round(seconds * 1000, 3)}
+                    for seconds, path in sorted(self.skills, reverse=True)
+                ],
+            }
+
+
+# 当前启用的分析器（None 表示未启用）
+active: Optional[Profiler] = None
+
+_NULL_PHASE = nullcontext()
+
+
+def enable(slowest: int = 10) -> Profiler:
+    """启用分析器"""
+    global active
+    active = Profiler(slowest)
+    return active
+
+
+def disable():
+    """停用分析器"""
+    global active
+    active = None
+
+
+def phase(name: str):
+    """计时一个阶段（未启用时为空操作）"""
+    if active is None:
+        return _NULL_PHASE
+    return active.phase(name)
+
+
+def count(name: str, n: int = 1):
+    """累加计数器（未启用时为空操作）"""
+    if active is not None:
+        active.count(name, n)
+
+
+def record_skill(path, seconds: float):
+    """记录单个技能的耗时（未启用时为空操作）"""
+    if active is not None:
+        active.record_skill(path, seconds)
+
+
+def profiled(name: str):
+    """装饰器：把函数的每次调用计入阶段 name（未启用时只多一次判断）"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if active is None:
+                return func(*args, **kwargs)
+            with active.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+"""
+Skills Registry Daemon
+
+常驻的技能注册表：启动时完整扫描一次，之后通过 inotify（不可用时轮询）监视技能根目录，
+只重新解析发生变化的技能，并通过本地 Unix socket 回答 list/search/detail 查询。
+响应与 list_skills.py --format json 的输出结构相同，list_skills.py 检测到守护进程时直接使用它。
+
+协议：客户端每次连接发送一行 JSON 请求，守护进程返回一行 JSON 响应。
+    {"op": "ping"}
+    {"op": "list", "level": "user"}
+    {"op": "search", "query": "pdf", "level": null, "limit": 5}
+    {"op": "detail", "name": "pdf-processor"}
+    {"op": "refresh"}
+
+list/search/detail 请求可以带上客户端解析出的技能根目录 "roots": [[路径, 级别], ...]
+（项目根目录取决于客户端的工作目录）。守护进程只返回这些根目录下的技能；
+其中有守护进程未监视的根目录时返回错误，客户端回退到本地扫描。
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import struct
+import signal
+import socket
+import argparse
+import threading
+import socketserver
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from list_skills import (
+    SkillCache, SkillInfo, SkillLister, get_registry_socket, level_matches
+)
+from skill_index import SearchIndex
+
+
+# 单个请求的大小上限
+MAX_REQUEST_BYTES = 64 * 1024
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# 根目录：关注技能子目录的增删和改名
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+# 技能目录：关注 SKILL.md 的写入和替换，以及 scripts/ 等子目录的增删
+SKILL_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_CREATE | IN_DELETE
+    | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """基于 ctypes 的最小 inotify 封装（仅 Linux）"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "当前系统不支持 inotify")
+
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        self.paths = {}  # wd -> 目录
+        self.wds = {}    # 目录 -> wd
+
+    def watch(self, path: Path, mask: int) -> bool:
+        """监视目录，目录不存在或无权限时返回 False"""
+        wd = self._add_watch(self.fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            return False
+        self.paths[wd] = path
+        self.wds[str(path)] = wd
+        return True
+
+    def unwatch(self, path: Path):
+        """取消监视（目录已删除时内核会自动移除）"""
+        wd = self.wds.pop(str(path), None)
+        if wd is not None:
+            self.paths.pop(wd, None)
+            self._rm_watch(self.fd, wd)
+
+    def clear(self):
+        """取消全部监视"""
+        for path in list(self.paths.values()):
+            self.unwatch(path)
+
+    def read_events(self, timeout: float) -> List[Tuple[Optional[Path], int, str]]:
+        """等待事件，返回 (被监视的目录, 掩码, 文件名) 列表；超时返回空列表"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                path = self.paths.get(wd)
+                if mask & IN_IGNORED:
+                    # 目录已被删除或卸载，内核已移除监视
+                    self.paths.pop(wd, None)
+                    if path is not None:
+                        self.wds.pop(str(path), None)
+                events.append((path, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SkillRegistry:
+    """内存中的技能注册表
+
+    skills 按扫描顺序保存已完全解析的 SkillInfo；搜索索引在技能集合变化后的
+    首次搜索时重建。所有修改都在锁内进行，查询拿到的是当时的快照。
+    """
+
+    def __init__(self, lister: SkillLister, paths: Optional[List[Tuple[Path, str]]] = None):
+        self.lister = lister
+        self.paths = paths
+        self.roots = []
+        self.skills = {}
+        self.keys = {}
+        self.generation = 0
+        self._index = None
+        self._index_generation = -1
+        self._lock = threading.RLock()
+
+    def current_roots(self) -> List[Tuple[Path, str]]:
+        """重新确定技能根目录（未指定路径时重新解析项目根目录和候选目录）"""
+        if self.paths is not None:
+            return list(self.paths)
+        self.lister.resolver.invalidate()
+        return self.lister.get_all_skills_dirs()
+
+    def refresh(self):
+        """重新确定根目录并完整扫描"""
+        roots = self.current_roots()
+        skills = [s.resolve() for s in self.lister.scan_skills(roots)]
+        with self._lock:
+            self.roots = roots
+            self.skills = {str(s.path): s for s in skills}
+            self.keys = {str(s.path): SkillCache.make_key(s.path) for s in skills}
+            self._changed()
+        self.save_cache()
+
+    def level_of(self, path: Path) -> Optional[str]:
+        """技能目录所属根目录的级别"""
+        for root, level in self.roots:
+            if path.parent == root:
+                return level
+        return None
+
+    def update_skill(self, path: Path) -> bool:
+        """重新加载单个技能（目录已不存在时移除），返回注册表是否有变化"""
+        level = self.level_of(path)
+        if level is None or path.name.startswith('.'):
+            return False
+        if not path.is_dir():
+            return self.remove_skill(path)
+
+        key = SkillCache.make_key(path)
+        with self._lock:
+            if str(path) in self.skills and self.keys.get(str(path)) == key and key is not None:
+                # SKILL.md 未变化，只可能是目录结构变化
+                old = self.skills[str(path)]
+                skill = SkillInfo(path, level, cached=old.to_cache())
+                skill._resolve_layout()
+            else:
+                skill = self.lister.load_skill(path, level).resolve()
+            self.skills[str(path)] = skill
+            self.keys[str(path)] = key
+            self._changed()
+        return True
+
+    def remove_skill(self, path: Path) -> bool:
+        """从注册表中移除技能"""
+        with self._lock:
+            if self.skills.pop(str(path), None) is None:
+                return False
+            self.keys.pop(str(path), None)
+            if self.lister.cache is not None:
+                self.lister.cache.invalidate(path)
+            self._changed()
+        return True
+
+    def poll(self) -> bool:
+        """轮询模式：比较根目录列表和每个技能的缓存键，返回注册表是否有变化"""
+        roots = self.current_roots()
+        if roots != self.roots:
+            self.refresh()
+            return True
+
+        changed = False
+        for root, _ in roots:
+            try:
+                with os.scandir(root) as entries:
+                    present = {
+                        entry.path for entry in entries
+                        if not entry.name.startswith('.') and entry.is_dir()
+                    }
+            except OSError:
+                present = set()
+
+            prefix = str(root).rstrip(os.sep) + os.sep
+            with self._lock:
+                known = {p for p in self.skills if p.startswith(prefix)}
+            for path in known - present:
+                changed |= self.remove_skill(Path(path))
+            for path in present:
+                if path not in known or SkillCache.make_key(Path(path)) != self.keys.get(path):
+                    changed |= self.update_skill(Path(path))
+        return changed
+
+    def save_cache(self):
+        """保存扫描缓存，守护进程重启时无需重新解析"""
+        cache = self.lister.cache
+        if cache is None:
+            return
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"⚠️  警告: 无法写入缓存 {cache.cache_path}: {e}", file=sys.stderr)
+
+    def _changed(self):
+        self.generation += 1
+
+    def match_roots(self, requested: List) -> Optional[set]:
+        """客户端请求的根目录都在监视范围内时返回这些根目录（绝对路径），否则返回 None"""
+        with self._lock:
+            watched = {(os.path.abspath(root), level) for root, level in self.roots}
+        try:
+            wanted = {(os.path.abspath(root), level) for root, level in requested}
+        except (TypeError, ValueError):
+            return None
+        if not wanted <= watched:
+            return None
+        return {root for root, _ in wanted}
+
+    def snapshot(self, level: Optional[str] = None, roots: Optional[set] = None) -> List[SkillInfo]:
+        """当前技能列表（可按级别和根目录过滤）"""
+        with self._lock:
+            skills = list(self.skills.values())
+        if level:
+            skills = [s for s in skills if level_matches(s.level, level)]
+        if roots is not None:
+            skills = [s for s in skills if os.path.abspath(s.path.parent) in roots]
+        return skills
+
+    def search(
+        self,
+        query: str,
+        level: Optional[str] = None,
+        limit: Optional[int] = None,
+        roots: Optional[set] = None
+    ) -> List[SkillInfo]:
+        """BM25 搜索（与 SkillLister.filter_skills 的排序一致）"""
+        with self._lock:
+            skills = list(self.skills.values())
+            if self._index_generation != self.generation:
+                self._index = SearchIndex.build(skills)
+                self._index_generation = self.generation
+            index = self._index
+
+        candidates = None
+        if level or roots is not None:
+            candidates = {
+                i for i, s in enumerate(skills)
+                if (not level or level_matches(s.level, level))
+                and (roots is None or os.path.abspath(s.path.parent) in roots)
+            }
+        hits = index.search(query, limit=limit, candidates=candidates)
+        return [skills[doc_id] for doc_id, _ in hits]
+
+    def handle(self, request: Dict) -> Dict:
+        """处理一条查询请求"""
+        op = request.get('op')
+        level = request.get('level')
+
+        if op == 'ping':
+            with self._lock:
+                return {
+                    'ok': True,
+                    'pid': os.getpid(),
+                    'total_count': len(self.skills),
+                    'generation': self.generation,
+                    'roots': [[str(root), root_level] for root, root_level in self.roots],
+                }
+
+        if op == 'refresh':
+            self.refresh()
+            return self.lister.json_data(self.snapshot())
+
+        # 客户端的根目录（取决于其工作目录）必须都在监视范围内
+        roots = None
+        if request.get('roots') is not None:
+            roots = self.match_roots(request['roots'])
+            if roots is None:
+                return {'error': "请求的技能根目录不在守护进程的监视范围内"}
+
+        if op == 'list':
+            return self.lister.json_data(self.snapshot(level, roots))
+
+        if op == 'search':
+            query = request.get('query')
+            if not query:
+                return {'error': "缺少查询关键词"}
+            return self.lister.json_data(self.search(query, level, request.get('limit'), roots))
+
+        if op == 'detail':
+            name = request.get('name')
+            skills = self.snapshot(level, roots)
+            matching = [s for s in skills if s.name == name]
+            data = self.lister.json_data(matching[:1])
+            if not matching:
+                data['suggestions'] = self.lister.suggest_names(skills, str(name or ''))
+            return data
+
+        return {'error': f"未知操作: {op}"}
+
+
+class RegistryWatcher:
+    """监视技能根目录并把变化同步到注册表"""
+
+    def __init__(self, registry: SkillRegistry, interval: float = 2.0, polling: bool = False):
+        self.registry = registry
+        self.interval = interval
+        self.inotify = None
+        if not polling:
+            try:
+                self.inotify = InotifyWatcher()
+            except (OSError, AttributeError) as e:
+                print(f"⚠️  inotify 不可用，改用轮询: {e}", file=sys.stderr)
+        self._stop = threading.Event()
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self.inotify else 'polling'
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """监视循环（在后台线程中运行）"""
+        if self.inotify is None:
+            while not self._stop.wait(self.interval):
+                if self.registry.poll():
+                    self.registry.save_cache()
+            return
+
+        self._watch_all()
+        try:
+            while not self._stop.is_set():
+                events = self.inotify.read_events(self.interval)
+                if not events:
+                    # 空闲时检查根目录本身是否出现或消失（如新建了 ~/.claude/skills）
+                    if self.registry.current_roots() != self.registry.roots:
+                        self._rebuild()
+                    continue
+                if self._apply(events):
+                    self.registry.save_cache()
+        finally:
+            self.inotify.close()
+
+    def _rebuild(self):
+        self.registry.refresh()
+        self._watch_all()
+
+    def _watch_all(self):
+        """为所有根目录和技能目录建立监视"""
+        self.inotify.clear()
+        for root, _ in self.registry.roots:
+            self.inotify.watch(root, ROOT_MASK)
+        for path in self.registry.snapshot():
+            self.inotify.watch(path.path, SKILL_MASK)
+
+    def _apply(self, events: List[Tuple[Optional[Path], int, str]]) -> bool:
+        """处理一批事件，同一技能在一批中只重新加载一次"""
+        roots = {str(root) for root, _ in self.registry.roots}
+        dirty = set()
+
+        for path, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                # 事件队列溢出，无法知道丢失了哪些变化
+                self._rebuild()
+                return True
+            if path is None:
+                continue
+
+            if str(path) in roots:
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    self._rebuild()
+                    return True
+                if not name or name.startswith('.') or not mask & IN_ISDIR:
+                    continue
+                child = path / name
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.inotify.watch(child, SKILL_MASK)
+                else:
+                    self.inotify.unwatch(child)
+                dirty.add(child)
+            elif not mask & IN_IGNORED:
+                dirty.add(path)
+
+        changed = False
+        for skill_path in dirty:
+            changed |= self.registry.update_skill(skill_path)
+        return changed
+
+
+class RegistryRequestHandler(socketserver.StreamRequestHandler):
+    """一行 JSON 请求，一行 JSON 响应"""
+
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError(line)
+        except ValueError:
+            response = {'error': "无效的请求"}
+        else:
+            try:
+                response = self.server.registry.handle(request)
+            except Exception as e:
+                response = {'error': f"处理请求失败: {e}"}
+        payload = json.dumps(response, ensure_ascii=False, separators=(',', ':'), default=str)
+        self.wfile.write(payload.encode('utf-8') + b'\n')
+
+
+class RegistryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """注册表查询服务"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, registry: SkillRegistry):
+        self.registry = registry
+        self.socket_path = socket_path
+        super().__init__(str(socket_path), RegistryRequestHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def prepare_socket(socket_path: Path) -> Tuple[bool, str]:
+    """检查 socket 路径：已有守护进程在运行时返回失败，遗留的 socket 文件直接删除"""
+    if not socket_path.exists():
+        socket_path.parent.mkdir(parents=True, exist_ok=True)
+        return True, ""
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            socket_path.unlink()
+            return True, ""
+    return False, f"注册表守护进程已在运行: {socket_path}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='常驻的技能注册表守护进程',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        '--socket',
+        help='Unix socket 路径 (默认: $AGENT_SKILLS_REGISTRY_SOCKET 或 缓存目录/registry.sock)'
+    )
+    parser.add_argument(
+        '-p', '--path',
+        help='监视指定路径而非默认路径'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=2.0,
+        help='轮询间隔秒数；inotify 模式下为检查根目录变化的间隔 (默认: 2)'
+    )
+    parser.add_argument(
+        '--polling',
+        action='store_true',
+        help='强制使用轮询而非 inotify'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不使用元数据缓存'
+    )
+
+    args = parser.parse_args()
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("❌ 当前系统不支持 Unix socket", file=sys.stderr)
+        return 1
+
+    paths = None
+    if args.path:
+        custom_path = Path(args.path)
+        if not custom_path.exists():
+            print(f"❌ 路径不存在: {custom_path}", file=sys.stderr)
+            return 1
+        paths = [(custom_path.resolve(), 'custom')]
+
+    socket_path = Path(args.socket) if args.socket else get_registry_socket()
+    success, message = prepare_socket(socket_path)
+    if not success:
+        print(f"❌ {message}", file=sys.stderr)
+        return 1
+
+    cache = None
+    if not args.no_cache:
+        cache = SkillCache()
+        cache.load()
+
+    registry = SkillRegistry(SkillLister(cache=cache), paths)
+    started = time.perf_counter()
+    registry.refresh()
+    print(
+        f"📚 已加载 {len(registry.skills)} 个技能 ({(time.perf_counter() - started) * 1000:.0f} ms)",
+        file=sys.stderr
+    )
+
+    watcher = RegistryWatcher(registry, args.poll_interval, args.polling)
+    watch_thread = threading.Thread(target=watcher.run, name='skills-watcher', daemon=True)
+    watch_thread.start()
+
+    server = RegistryServer(socket_path, registry)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"✅ 注册表守护进程已启动 ({watcher.mode}): {socket_path}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    finally:
+        watcher.stop()
+        server.server_close()
+        registry.save_cache()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("\n已停止", file=sys.stderr)
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ 错误: {str(e)}", file=sys.stderr)
+        sys.exit(1)